@@ -11,12 +11,13 @@ Author: Network Administrator
 Date: September 2025
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
 import json
 import os
 import sys
 import logging
+import uuid
 from datetime import datetime
 
 # Add modules directory to path
@@ -42,7 +43,28 @@ logging.basicConfig(
 
 # Initialize components
 device_manager = DeviceManager()
-network_monitor = NetworkMonitor()
+network_monitor = NetworkMonitor(device_manager=device_manager)
+
+# Versions restart at 0 with the process, so ETags carry a per-process id
+ETAG_PREFIX = uuid.uuid4().hex[:8]
+
+def versioned_etag(resource, version):
+    """Weak ETag of a resource at a given version"""
+    return f"{ETAG_PREFIX}-{resource}-{version}"
+
+def not_modified(etag):
+    """304 response if the client already holds etag, else None"""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    return response
+
+def with_etag(response, etag):
+    """Tag a response so clients revalidate with If-None-Match"""
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/')
 def index():
@@ -51,25 +73,49 @@ def index():
 
 @app.route('/api/devices')
 def get_devices():
-    """Get all discovered devices"""
+    """Get all discovered devices from the status cache (?fresh=1 to re-poll)"""
     try:
-        devices = device_manager.get_all_devices()
-        return jsonify({
+        fresh = request.args.get('fresh') == '1'
+        if not fresh:
+            version = device_manager.get_status_version()
+            if version is not None:
+                cached = not_modified(versioned_etag('devices', version))
+                if cached:
+                    return cached
+                    
+        version, devices = device_manager.get_cached_status(fresh=fresh)
+        return with_etag(jsonify({
             'success': True,
             'devices': devices,
             'count': len(devices)
-        })
+        }), versioned_etag('devices', version))
     except Exception as e:
         logging.error(f"Error getting devices: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/devices/discover', methods=['POST'])
 def discover_devices():
-    """Discover devices on the network"""
+    """Discover devices on the network
+    
+    With {"stream": true} in the body (or ?stream=1) results are returned
+    as NDJSON, one record per discovered host followed by a summary record.
+    """
     try:
         data = request.get_json()
         network_range = data.get('network_range', '192.168.1.0/24')
         
+        if data.get('stream') or request.args.get('stream') == '1':
+            records = device_manager.stream_discover_devices(network_range)
+            
+            def generate():
+                for record in records:
+                    yield json.dumps(record) + '\n'
+            
+            return Response(stream_with_context(generate()),
+                            mimetype='application/x-ndjson',
+                            headers={'Cache-Control': 'no-cache',
+                                     'X-Accel-Buffering': 'no'})
+        
         discovered = device_manager.discover_devices(network_range)
         return jsonify({
             'success': True,
@@ -93,6 +139,27 @@ def get_device_status(device_id):
         logging.error(f"Error getting device status: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/devices/<device_id>/metrics')
+def get_device_metrics(device_id):
+    """Get stored history of a device metric (?metric=&start=&end= epoch seconds)"""
+    try:
+        metric = request.args.get('metric', 'cpu_usage')
+        start = request.args.get('start', type=int)
+        end = request.args.get('end', type=int)
+        max_points = request.args.get('max_points', 300, type=int)
+        history = network_monitor.get_metric_history(device_id, metric, start, end, max_points)
+        return jsonify({
+            'success': True,
+            'device_id': device_id,
+            'metric': metric,
+            'resolution': history['resolution'],
+            'points': history['points'],
+            'count': len(history['points'])
+        })
+    except Exception as e:
+        logging.error(f"Error getting device metrics: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/devices/<device_id>/config', methods=['GET'])
 def get_device_config(device_id):
     """Get configuration of a specific device"""
@@ -113,7 +180,7 @@ def update_device_config(device_id):
         config_data = request.get_json()
         result = device_manager.update_device_config(device_id, config_data)
         return jsonify({
-            'success': True,
+            'success': result.get('success', True),
             'result': result
         })
     except Exception as e:
@@ -133,6 +200,74 @@ def backup_device_config(device_id):
         logging.error(f"Error backing up device config: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/backups/fleet', methods=['POST'])
+def start_fleet_backup():
+    """Start a backup of all enabled devices"""
+    try:
+        job = device_manager.start_fleet_backup()
+        return jsonify({
+            'success': True,
+            'job': job
+        }), 202
+    except Exception as e:
+        logging.error(f"Error starting fleet backup: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/backups/jobs')
+def get_backup_jobs():
+    """List recent fleet backup jobs"""
+    try:
+        jobs = device_manager.get_backup_jobs()
+        return jsonify({
+            'success': True,
+            'jobs': jobs
+        })
+    except Exception as e:
+        logging.error(f"Error getting backup jobs: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/backups/jobs/<job_id>')
+def get_backup_job(job_id):
+    """Get progress of a fleet backup job"""
+    try:
+        job = device_manager.get_backup_job(job_id)
+        return jsonify({
+            'success': True,
+            'job': job
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except Exception as e:
+        logging.error(f"Error getting backup job: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/devices/<device_id>/drift')
+def get_device_drift(device_id):
+    """Compare the running config of a device with its latest backup"""
+    try:
+        drift = device_manager.check_config_drift(device_id)
+        return jsonify({
+            'success': True,
+            'drift': drift
+        })
+    except Exception as e:
+        logging.error(f"Error checking config drift: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/devices/<device_id>/backups')
+def get_device_backups(device_id):
+    """List stored backups of a device"""
+    try:
+        backups = device_manager.get_device_backups(device_id)
+        return jsonify({
+            'success': True,
+            'backups': backups,
+            'count': len(backups)
+        })
+    except Exception as e:
+        logging.error(f"Error listing device backups: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/devices/<device_id>/restore', methods=['POST'])
 def restore_device_config(device_id):
     """Restore device configuration from backup"""
@@ -141,7 +276,7 @@ def restore_device_config(device_id):
         backup_id = data.get('backup_id')
         restore_result = device_manager.restore_device_config(device_id, backup_id)
         return jsonify({
-            'success': True,
+            'success': restore_result.get('success', True),
             'result': restore_result
         })
     except Exception as e:
@@ -152,26 +287,115 @@ def restore_device_config(device_id):
 def get_monitoring_dashboard():
     """Get monitoring dashboard data"""
     try:
-        dashboard_data = network_monitor.get_dashboard_data()
-        return jsonify({
+        snapshot = network_monitor.get_snapshot()
+        etag = versioned_etag('dashboard', snapshot.version)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+            
+        return with_etag(jsonify({
             'success': True,
-            'data': dashboard_data
-        })
+            'data': snapshot.dashboard
+        }), etag)
     except Exception as e:
         logging.error(f"Error getting dashboard data: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/events')
+def stream_events():
+    """
+    Server-Sent Events stream of monitoring deltas: changed device statuses,
+    new or updated alerts and summary counters, one 'update' event per
+    published snapshot
+    """
+    # Subscribe before reporting the current version so no delta is missed
+    updates = network_monitor.stream_updates()
+    version = network_monitor.get_snapshot().version
+    
+    def generate():
+        yield f"event: hello\ndata: {json.dumps({'version': version})}\n\n"
+        for delta in updates:
+            if delta is None:
+                # Keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: update\nid: {delta['version']}\ndata: {json.dumps(delta)}\n\n"
+        # Stream ended because the client fell behind or the monitor stopped
+        yield "event: resync\ndata: {}\n\n"
+        
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/alerts')
 def get_alerts():
-    """Get current system alerts"""
+    """Get system alerts (?severity=&state=&device_id=&acknowledged=&since=&limit=&offset=)"""
+    try:
+        since = request.args.get('since')
+        if since:
+            try:
+                since = float(since)
+            except ValueError:
+                since = datetime.fromisoformat(since).timestamp()
+        acknowledged = request.args.get('acknowledged')
+        if acknowledged is not None:
+            acknowledged = acknowledged.lower() in ('1', 'true', 'yes')
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        
+        # Read before querying, so a write racing the query only costs a refetch
+        etag = versioned_etag('alerts', network_monitor.get_alerts_version())
+        cached = not_modified(etag)
+        if cached:
+            return cached
+            
+        result = network_monitor.get_alerts(
+            device_id=request.args.get('device_id'),
+            severity=request.args.get('severity'),
+            state=request.args.get('state'),
+            acknowledged=acknowledged,
+            since=since or None,
+            limit=limit,
+            offset=offset
+        )
+        return with_etag(jsonify({
+            'success': True,
+            'alerts': result['alerts'],
+            'total': result['total'],
+            'limit': limit,
+            'offset': offset
+        }), etag)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error getting alerts: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/alerts/<alert_id>/acknowledge', methods=['POST'])
+def acknowledge_alert(alert_id):
+    """Acknowledge an alert"""
     try:
-        alerts = network_monitor.get_alerts()
+        if not network_monitor.acknowledge_alert(alert_id):
+            return jsonify({'success': False, 'error': f'Alert {alert_id} not found'}), 404
         return jsonify({
             'success': True,
-            'alerts': alerts
+            'message': 'Alert acknowledged successfully'
         })
     except Exception as e:
-        logging.error(f"Error getting alerts: {str(e)}")
+        logging.error(f"Error acknowledging alert: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/alerts/<alert_id>/resolve', methods=['POST'])
+def resolve_alert(alert_id):
+    """Mark an alert as resolved"""
+    try:
+        if not network_monitor.resolve_alert(alert_id):
+            return jsonify({'success': False, 'error': f'Alert {alert_id} not found'}), 404
+        return jsonify({
+            'success': True,
+            'message': 'Alert resolved successfully'
+        })
+    except Exception as e:
+        logging.error(f"Error resolving alert: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/health')
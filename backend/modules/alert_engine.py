@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Alert Engine Module
+
+Threshold alert evaluation for the network monitor:
+- Rules are plain data (metric, operator, threshold, duration, severity)
+- Rules are compiled once into per-metric evaluators
+- Only metrics that changed in a collection cycle are evaluated, so the
+  cost follows change volume rather than devices x rules
+- Each (device, rule) breach is one incident moving pending -> firing ->
+  resolved, with a for-duration before firing and hysteresis before
+  resolving
+"""
+
+import logging
+import operator
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne
+}
+
+# port_down and low_client_count are off by default: unused switch ports
+# and idle APs are normal on most networks. monitoring.alert_rules_enabled
+# turns them on.
+DEFAULT_ALERT_RULES = [
+    {
+        'name': 'device_offline',
+        'metric': 'status',
+        'operator': '!=',
+        'threshold': 'online',
+        'duration': 120,
+        'severity': 'critical',
+        'description': 'Device is offline or unreachable',
+        'message': 'Device {device_id} has been {value} for more than {duration} seconds'
+    },
+    {
+        'name': 'high_cpu_usage',
+        'metric': 'cpu_usage',
+        'operator': '>',
+        'threshold': 80,
+        'hysteresis': 5,
+        'severity': 'warning',
+        'description': 'CPU usage is above threshold',
+        'message': 'CPU usage is {value}% (threshold: {threshold}%)'
+    },
+    {
+        'name': 'high_memory_usage',
+        'metric': 'memory_usage',
+        'operator': '>',
+        'threshold': 85,
+        'hysteresis': 5,
+        'severity': 'warning',
+        'description': 'Memory usage is above threshold',
+        'message': 'Memory usage is {value}% (threshold: {threshold}%)'
+    },
+    {
+        'name': 'port_down',
+        'metric': 'ports_down',
+        'operator': '>',
+        'threshold': 0,
+        'enabled': False,
+        'severity': 'warning',
+        'description': 'Network port is down',
+        'message': '{value} ports are down'
+    },
+    {
+        'name': 'high_temperature',
+        'metric': 'temperature',
+        'operator': '>',
+        'threshold': 60,
+        'hysteresis': 3,
+        'severity': 'warning',
+        'description': 'Device temperature is above threshold',
+        'message': 'Temperature is {value}°C (threshold: {threshold}°C)'
+    },
+    {
+        'name': 'low_client_count',
+        'metric': 'client_count',
+        'operator': '<=',
+        'threshold': 0,
+        'enabled': False,
+        'severity': 'info',
+        'description': 'No wireless clients connected to AP',
+        'message': 'No wireless clients connected to {device_id}'
+    }
+]
+
+# monitoring.alert_thresholds keys -> (rule name, rule field)
+THRESHOLD_OVERRIDES = {
+    'cpu_usage': ('high_cpu_usage', 'threshold'),
+    'memory_usage': ('high_memory_usage', 'threshold'),
+    'temperature': ('high_temperature', 'threshold'),
+    'offline_timeout': ('device_offline', 'duration')
+}
+
+
+class AlertRule:
+    """
+    A single threshold rule, compiled into predicates.
+
+    A rule starts matching at threshold. Once firing, it keeps matching
+    until the value is hysteresis past the threshold in the other
+    direction, so a value hovering at the threshold does not flap.
+    """
+
+    def __init__(self, name: str, metric: str, operator: str, threshold: Any,
+                 duration: float = 0, hysteresis: float = 0, severity: str = 'info',
+                 description: str = '', message: Optional[str] = None, enabled: bool = True):
+        if operator not in OPERATORS:
+            raise ValueError(f"Unknown operator '{operator}' in alert rule {name}")
+
+        self.name = name
+        self.metric = metric
+        self.operator = operator
+        self.threshold = threshold
+        self.duration = duration
+        self.hysteresis = hysteresis
+        self.severity = severity
+        self.description = description
+        self.message = message or f"{metric} {operator} {threshold}"
+        self.enabled = enabled
+        self.matches = self._compile(threshold)
+        self.still_matches = self._compile(self._clear_threshold())
+
+    @classmethod
+    def from_dict(cls, rule: Dict) -> 'AlertRule':
+        return cls(**rule)
+
+    def format_message(self, device_id: str, value: Any) -> str:
+        return self.message.format(device_id=device_id, value=value,
+                                   threshold=self.threshold, duration=self.duration)
+
+    def _clear_threshold(self) -> Any:
+        """Threshold a firing incident has to cross to resolve"""
+        if not self.hysteresis or not isinstance(self.threshold, (int, float)):
+            return self.threshold
+        if self.operator in ('>', '>='):
+            return self.threshold - self.hysteresis
+        if self.operator in ('<', '<='):
+            return self.threshold + self.hysteresis
+        return self.threshold
+
+    def _compile(self, threshold: Any) -> Callable[[Any], bool]:
+        """Predicate for one metric value; values of the wrong type never match"""
+        compare = OPERATORS[self.operator]
+
+        if isinstance(threshold, (int, float)) and not isinstance(threshold, bool):
+            def matches(value):
+                return (isinstance(value, (int, float)) and not isinstance(value, bool)
+                        and compare(value, threshold))
+        else:
+            def matches(value):
+                return compare(value, threshold)
+        return matches
+
+
+class Incident:
+    """One breach of a rule on a device, from first match to resolution"""
+
+    def __init__(self, device_id: str, rule: AlertRule, value: Any, now: float):
+        self.device_id = device_id
+        self.rule = rule
+        self.value = value
+        self.started = now
+        self.state = 'pending'
+        self.alert = None  # Alert record attached by the monitor once firing
+
+
+class AlertEngine:
+    """
+    Evaluates compiled rules against changed metrics and runs the
+    pending -> firing -> resolved state machine of each incident.
+
+    evaluate() and advance() return (event, incident) transitions, where
+    event is 'firing', 'updated' or 'resolved'.
+    """
+
+    def __init__(self, rules: List[Dict]):
+        self.rules = {}
+        for rule in rules:
+            try:
+                compiled = AlertRule.from_dict(rule)
+            except (TypeError, ValueError) as e:
+                # One bad rule in the config must not stop monitoring
+                name = rule.get('name', '?') if isinstance(rule, dict) else rule
+                logging.error(f"Skipping invalid alert rule {name}: {e}")
+                continue
+            self.rules[compiled.name] = compiled
+        self.evaluators: Dict[str, List[AlertRule]] = {}
+        for rule in self.rules.values():
+            if rule.enabled:
+                self.evaluators.setdefault(rule.metric, []).append(rule)
+
+        # (device_id, rule_name) -> open (pending or firing) incident
+        self.incidents: Dict[Tuple[str, str], Incident] = {}
+
+    def evaluate(self, device_id: str, changed: Dict[str, Any],
+                 now: float) -> List[Tuple[str, Incident]]:
+        """Run the rules of each changed metric and move incidents along"""
+        events = []
+        for metric, value in changed.items():
+            for rule in self.evaluators.get(metric, ()):
+                key = (device_id, rule.name)
+                incident = self.incidents.get(key)
+
+                if incident is None:
+                    if rule.matches(value):
+                        incident = self.incidents[key] = Incident(device_id, rule, value, now)
+                        self._promote(incident, now, events)
+                elif incident.state == 'pending':
+                    if rule.matches(value):
+                        incident.value = value
+                        self._promote(incident, now, events)
+                    else:
+                        # Cleared before its duration: never fired
+                        del self.incidents[key]
+                elif rule.still_matches(value):
+                    incident.value = value
+                    events.append(('updated', incident))
+                else:
+                    incident.value = value
+                    incident.state = 'resolved'
+                    del self.incidents[key]
+                    events.append(('resolved', incident))
+        return events
+
+    def advance(self, now: float) -> List[Tuple[str, Incident]]:
+        """Fire pending incidents whose condition has now lasted long enough"""
+        events = []
+        for incident in list(self.incidents.values()):
+            if incident.state == 'pending':
+                self._promote(incident, now, events)
+        return events
+
+    def restore(self, alert: Dict, started: float) -> Optional[Incident]:
+        """Reattach an alert left firing by a previous run to a firing incident"""
+        rule = self.rules.get(alert['rule_name'])
+        if rule is None or not rule.enabled:
+            return None
+
+        incident = Incident(alert['device_id'], rule, alert.get('value'), started)
+        incident.state = 'firing'
+        incident.alert = alert
+        self.incidents[(incident.device_id, rule.name)] = incident
+        return incident
+
+    def close(self, device_id: str, rule_name: str) -> Optional[Incident]:
+        """Drop an open incident, e.g. when its alert is resolved by hand"""
+        return self.incidents.pop((device_id, rule_name), None)
+
+    def forget_device(self, device_id: str) -> List[Incident]:
+        """Drop the open incidents of a device that is no longer monitored"""
+        keys = [key for key in self.incidents if key[0] == device_id]
+        return [self.incidents.pop(key) for key in keys]
+
+    def _promote(self, incident: Incident, now: float, events: List):
+        if now - incident.started >= incident.rule.duration:
+            incident.state = 'firing'
+            events.append(('firing', incident))
+
+
+def build_alert_rules(config: Dict) -> List[Dict]:
+    """
+    Alert rules from the monitoring config: monitoring.alert_rules replaces
+    the defaults, monitoring.alert_thresholds and
+    monitoring.alert_rules_enabled adjust them. Invalid rules
+    are logged and skipped, here or when AlertEngine compiles them.
+    """
+    if config.get('alert_rules'):
+        rules = []
+        for rule in config['alert_rules']:
+            if not isinstance(rule, dict):
+                logging.error(f"Skipping alert rule that is not an object: {rule!r}")
+                continue
+            rules.append(dict(rule))
+        return rules
+
+    rules = {rule['name']: dict(rule) for rule in DEFAULT_ALERT_RULES}
+    for key, value in config.get('alert_thresholds', {}).items():
+        if key in THRESHOLD_OVERRIDES:
+            rule_name, field = THRESHOLD_OVERRIDES[key]
+            rules[rule_name][field] = value
+    for rule_name, enabled in config.get('alert_rules_enabled', {}).items():
+        if rule_name in rules:
+            rules[rule_name]['enabled'] = bool(enabled)
+    return list(rules.values())
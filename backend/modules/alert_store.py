@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Alert Store Module
+
+Durable alert history for the network monitor:
+- SQLite table indexed by device, severity, state and creation time
+- Open (unresolved) alerts kept in memory by id, so acknowledge and
+  resolve are a dict lookup plus a single-row update
+- Filtered, paginated queries over the full history
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Columns that can be filtered on, besides the creation time
+FILTER_COLUMNS = ('device_id', 'severity', 'state', 'acknowledged')
+
+
+class AlertStore:
+    """SQLite-backed alert store with an in-memory index of open alerts"""
+
+    def __init__(self, path: str, recent_size: int = 10):
+        self.path = path
+        # lock guards the in-memory index and is taken with the monitor
+        # lock held; db_lock serializes connection I/O, so a slow query
+        # or write never holds up the monitor
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS alerts ('
+                'id TEXT PRIMARY KEY, device_id TEXT NOT NULL, rule_name TEXT NOT NULL, '
+                'severity TEXT NOT NULL, state TEXT NOT NULL, acknowledged INTEGER NOT NULL, '
+                'created REAL NOT NULL, data TEXT NOT NULL)')
+            for column in ('device_id', 'severity', 'state', 'created'):
+                self.conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS alerts_{column} ON alerts ({column}'
+                    f'{", created" if column != "created" else ""})')
+
+        self.open_alerts: Dict[str, Dict] = {
+            alert['id']: alert
+            for alert in self._load("WHERE state != 'resolved' ORDER BY created")
+        }
+        self.recent = deque(
+            (self.open_alerts.get(alert['id'], alert)
+             for alert in self._load(f'ORDER BY created DESC LIMIT {int(recent_size)}')),
+            maxlen=recent_size)
+        self.total = self.conn.execute('SELECT COUNT(*) FROM alerts').fetchone()[0]
+        # Bumped whenever the table changes, so query results can be cached by version
+        self.version = 0
+
+    def stage(self, alerts: Iterable[Dict]) -> List[Tuple]:
+        """
+        Index new or changed alerts in memory and return their table rows.
+        Rows are snapshots, so write() can run after the caller has
+        released whatever lock guards the alert records.
+        """
+        with self.lock:
+            rows = []
+            for alert in alerts:
+                if alert['id'] not in self.open_alerts and not alert.get('resolved'):
+                    # Newly raised
+                    self.recent.appendleft(alert)
+                    self.total += 1
+                self._index(alert)
+                rows.append(self._row(alert))
+            return rows
+
+    def write(self, rows: Iterable[Tuple]):
+        """Persist staged rows in one transaction"""
+        rows = list(rows)
+        if not rows:
+            return
+
+        with self.db_lock:
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO alerts '
+                    '(id, device_id, rule_name, severity, state, acknowledged, created, data) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self.version += 1
+
+    def get(self, alert_id: str) -> Optional[Dict]:
+        """One alert by id; open and recent alerts are the live records"""
+        with self.lock:
+            alert = self.open_alerts.get(alert_id)
+            if alert is None:
+                alert = next((recent for recent in self.recent if recent['id'] == alert_id), None)
+        if alert is not None:
+            return alert
+
+        with self.db_lock:
+            loaded = self._load('WHERE id = ?', (alert_id,))
+        return loaded[0] if loaded else None
+
+    def query(self, device_id: Optional[str] = None, severity: Optional[str] = None,
+              state: Optional[str] = None, acknowledged: Optional[bool] = None,
+              since: Optional[float] = None, limit: int = 100,
+              offset: int = 0) -> Tuple[List[Dict], int]:
+        """Alerts matching all given filters, newest first, and the total match count"""
+        clauses, params = [], []
+        for column, value in zip(FILTER_COLUMNS, (device_id, severity, state, acknowledged)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(int(value) if column == 'acknowledged' else value)
+        if since is not None:
+            clauses.append('created >= ?')
+            params.append(float(since))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        with self.db_lock:
+            total = self.conn.execute(f'SELECT COUNT(*) FROM alerts {where}', params).fetchone()[0]
+            alerts = self._load(f'{where} ORDER BY created DESC LIMIT ? OFFSET ?',
+                                (*params, int(limit), int(offset)))
+        return alerts, total
+
+    def get_recent(self) -> List[Dict]:
+        """Most recently raised alerts, newest first"""
+        with self.lock:
+            return list(self.recent)
+
+    def prune(self, before: float) -> int:
+        """Delete resolved alerts raised before an epoch timestamp"""
+        with self.db_lock:
+            with self.conn:
+                deleted = self.conn.execute(
+                    "DELETE FROM alerts WHERE state = 'resolved' AND created < ?",
+                    (before,)).rowcount
+            if deleted:
+                self.version += 1
+
+        with self.lock:
+            self.total -= deleted
+        return deleted
+
+    def close(self):
+        with self.db_lock:
+            self.conn.close()
+
+    def _index(self, alert: Dict):
+        """Track an alert in the open index while it is unresolved (lock held)"""
+        if alert.get('resolved'):
+            self.open_alerts.pop(alert['id'], None)
+        else:
+            self.open_alerts[alert['id']] = alert
+
+    def _row(self, alert: Dict) -> Tuple:
+        """Table row of an alert; created is the incident start as epoch seconds"""
+        created = alert.get('started_at') or alert.get('timestamp')
+        created = datetime.fromisoformat(created).timestamp() if created else time.time()
+        return (alert['id'], alert['device_id'], alert['rule_name'], alert['severity'],
+                alert['state'], int(alert.get('acknowledged', False)), created,
+                json.dumps(alert))
+
+    def _load(self, clause: str, params: Tuple = ()) -> List[Dict]:
+        """Alert records selected by a WHERE/ORDER clause (db_lock held)"""
+        rows = self.conn.execute(f'SELECT data FROM alerts {clause}', params).fetchall()
+        return [json.loads(data) for (data,) in rows]
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Backup Jobs Module
+
+Fleet-wide configuration backup jobs:
+- Backs up many devices in parallel on a bounded worker pool
+- Tracks per-device progress for the job status endpoint
+- Writes a JSON report next to the backups when the job finishes
+"""
+
+import os
+import json
+import uuid
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+class FleetBackupJob:
+    """Parallel backup of a set of devices with per-device progress"""
+
+    def __init__(self, device_ids: List[str], backup_device: Callable[[str], Dict],
+                 max_parallel: int = 8, report_directory: Optional[str] = None):
+        self.job_id = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.backup_device = backup_device
+        self.max_parallel = max(1, int(max_parallel))
+        self.report_directory = report_directory
+        self.state = 'pending'
+        self.started_at = None
+        self.finished_at = None
+        self.devices = {device_id: {'state': 'pending'} for device_id in device_ids}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        """Run the job in a background thread"""
+        self.state = 'running'
+        self.started_at = datetime.now().isoformat()
+        self.thread = threading.Thread(target=self._run, name=self.job_id)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def to_dict(self) -> Dict:
+        """Job status with per-device progress"""
+        with self.lock:
+            devices = {device_id: progress.copy() for device_id, progress in self.devices.items()}
+
+        states = [progress['state'] for progress in devices.values()]
+        return {
+            'job_id': self.job_id,
+            'state': self.state,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'total': len(states),
+            'completed': sum(1 for state in states if state in ('success', 'failed')),
+            'succeeded': states.count('success'),
+            'failed': states.count('failed'),
+            'devices': devices
+        }
+
+    def _run(self):
+        """Back up every device, at most max_parallel at a time"""
+        logging.info(f"Fleet backup {self.job_id} started for {len(self.devices)} devices")
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_parallel,
+                                    thread_name_prefix='fleet-backup') as executor:
+                list(executor.map(self._backup_one, list(self.devices)))
+        except Exception as e:
+            logging.error(f"Fleet backup {self.job_id} aborted: {e}")
+
+        self.finished_at = datetime.now().isoformat()
+        self.state = 'completed'
+
+        status = self.to_dict()
+        logging.info(f"Fleet backup {self.job_id} finished: "
+                     f"{status['succeeded']} succeeded, {status['failed']} failed")
+        self._write_report(status)
+
+    def _backup_one(self, device_id: str):
+        """Back up a single device and record the outcome"""
+        self._update(device_id, state='running', started_at=datetime.now().isoformat())
+
+        try:
+            result = self.backup_device(device_id)
+            if result.get('success'):
+                self._update(device_id, state='success', backup_id=result.get('backup_id'))
+            else:
+                self._update(device_id, state='failed', error=result.get('message', 'Backup failed'))
+        except Exception as e:
+            logging.error(f"Error backing up {device_id}: {e}")
+            self._update(device_id, state='failed', error=str(e))
+
+        self._update(device_id, finished_at=datetime.now().isoformat())
+
+    def _update(self, device_id: str, **fields):
+        """Merge fields into a device's progress entry"""
+        with self.lock:
+            self.devices[device_id].update(fields)
+
+    def _write_report(self, status: Dict):
+        """Save the final job status as a JSON report"""
+        if not self.report_directory:
+            return
+
+        try:
+            os.makedirs(self.report_directory, exist_ok=True)
+            with open(os.path.join(self.report_directory, f"{self.job_id}.json"), 'w') as f:
+                json.dump(status, f, indent=2)
+        except Exception as e:
+            logging.error(f"Error writing backup report for {self.job_id}: {e}")
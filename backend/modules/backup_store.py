@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Backup Store Module
+
+Content-addressed, deduplicated storage for configuration backups:
+- Each config is hashed (SHA-256) and stored once as a gzip blob
+- A small per-device manifest maps backup_ids to blob hashes
+- Blobs are reference counted and deleted once no manifest uses them
+
+Storage and write I/O therefore scale with actual config changes,
+not with fleet size times days of retention.
+"""
+
+import os
+import json
+import gzip
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class BackupStore:
+    """Deduplicated backup store rooted at a backup directory"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.blob_dir = os.path.join(root, 'blobs')
+        self.manifest_dir = os.path.join(root, 'manifests')
+        self.lock = threading.RLock()
+        self._refcounts = None
+
+    def save(self, device_id: str, config_text: str, timestamp: Optional[str] = None) -> Dict:
+        """Store a config for a device and return its manifest entry"""
+        data = config_text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        timestamp = timestamp or datetime.now().isoformat()
+
+        with self.lock:
+            refcounts = self._get_refcounts()
+            deduplicated = refcounts.get(digest, 0) > 0 or os.path.exists(self._blob_path(digest))
+            if not deduplicated:
+                self._write_blob(digest, data)
+
+            manifest = self._read_manifest(device_id)
+            entry = {
+                'backup_id': self._new_backup_id(device_id, manifest),
+                'hash': digest,
+                'timestamp': timestamp,
+                'size': len(data)
+            }
+            manifest.append(entry)
+            self._write_manifest(device_id, manifest)
+            refcounts[digest] = refcounts.get(digest, 0) + 1
+
+        result = entry.copy()
+        result['deduplicated'] = deduplicated
+        return result
+
+    def load(self, device_id: str, backup_id: str) -> str:
+        """Return the config text of a backup"""
+        entry = self.get_entry(device_id, backup_id)
+        if not entry:
+            raise ValueError(f"Backup {backup_id} not found for device {device_id}")
+
+        with gzip.open(self._blob_path(entry['hash']), 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def get_entry(self, device_id: str, backup_id: str) -> Optional[Dict]:
+        """Find a backup's manifest entry"""
+        with self.lock:
+            for entry in self._read_manifest(device_id):
+                if entry['backup_id'] == backup_id:
+                    return entry
+        return None
+
+    def list_backups(self, device_id: str) -> List[Dict]:
+        """All backups of a device, newest first"""
+        with self.lock:
+            return list(reversed(self._read_manifest(device_id)))
+
+    def latest(self, device_id: str) -> Optional[Dict]:
+        """Most recent backup entry of a device"""
+        with self.lock:
+            manifest = self._read_manifest(device_id)
+        return manifest[-1] if manifest else None
+
+    def prune(self, device_id: str, retention_count: int) -> int:
+        """Keep the newest retention_count backups and drop unreferenced blobs"""
+        if retention_count <= 0:
+            return 0
+
+        with self.lock:
+            manifest = self._read_manifest(device_id)
+            expired = manifest[:-retention_count]
+            if not expired:
+                return 0
+
+            self._write_manifest(device_id, manifest[-retention_count:])
+
+            refcounts = self._get_refcounts()
+            for entry in expired:
+                digest = entry['hash']
+                refcounts[digest] = refcounts.get(digest, 1) - 1
+                if refcounts[digest] <= 0:
+                    del refcounts[digest]
+                    self._delete_blob(digest)
+
+        return len(expired)
+
+    def _get_refcounts(self) -> Dict[str, int]:
+        """Blob reference counts, built from all manifests on first use"""
+        if self._refcounts is None:
+            refcounts = {}
+            if os.path.isdir(self.manifest_dir):
+                for name in os.listdir(self.manifest_dir):
+                    if not name.endswith('.json'):
+                        continue
+                    for entry in self._read_manifest(name[:-len('.json')]):
+                        refcounts[entry['hash']] = refcounts.get(entry['hash'], 0) + 1
+            self._refcounts = refcounts
+        return self._refcounts
+
+    def _new_backup_id(self, device_id: str, manifest: List[Dict]) -> str:
+        """Timestamped backup id, unique within the device manifest"""
+        base = f"{device_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        existing = {entry['backup_id'] for entry in manifest}
+        backup_id = base
+        suffix = 1
+        while backup_id in existing:
+            backup_id = f"{base}_{suffix}"
+            suffix += 1
+        return backup_id
+
+    def _blob_path(self, digest: str) -> str:
+        """Blobs are fanned out by the first two hex digits of their hash"""
+        return os.path.join(self.blob_dir, digest[:2], f"{digest}.gz")
+
+    def _manifest_path(self, device_id: str) -> str:
+        """Location of a device manifest, rejecting ids that escape the store"""
+        if not device_id or os.path.basename(device_id) != device_id:
+            raise ValueError(f"Invalid device id: {device_id}")
+        return os.path.join(self.manifest_dir, f"{device_id}.json")
+
+    def _read_manifest(self, device_id: str) -> List[Dict]:
+        """Load a device manifest (oldest entry first)"""
+        path = self._manifest_path(device_id)
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r') as f:
+            return json.load(f).get('backups', [])
+
+    def _write_manifest(self, device_id: str, manifest: List[Dict]):
+        """Atomically replace a device manifest"""
+        path = self._manifest_path(device_id)
+        self._atomic_write(path, json.dumps({'device_id': device_id, 'backups': manifest},
+                                            indent=2).encode('utf-8'))
+
+    def _write_blob(self, digest: str, data: bytes):
+        """Compress and store a new blob"""
+        self._atomic_write(self._blob_path(digest), gzip.compress(data))
+
+    def _delete_blob(self, digest: str):
+        """Remove a blob no manifest refers to any more"""
+        try:
+            os.remove(self._blob_path(digest))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.error(f"Error deleting backup blob {digest}: {e}")
+
+    def _atomic_write(self, path: str, data: bytes):
+        """Write via a temporary file so readers never see partial data"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.{threading.get_ident()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Config Diff Module
+
+Line and section aware diffs of device CLI configurations:
+- Parses Comware and ArubaOS configs into top-level stanzas
+- Hashes normalized configs so drift checks can skip unchanged devices
+- Turns a diff into the minimal CLI commands that move a device from
+  its running config to a target config
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+
+class Dialect:
+    """CLI syntax details of a configuration language"""
+
+    def __init__(self, name: str, comment_prefixes: Tuple[str, ...], negate: str,
+                 exit_command: str, ignore_prefixes: Tuple[str, ...] = (),
+                 error_prefix: str = '%'):
+        self.name = name
+        self.comment_prefixes = comment_prefixes
+        self.negate = negate
+        self.exit_command = exit_command
+        self.ignore_prefixes = ignore_prefixes
+        self.error_prefix = error_prefix
+
+    def negate_line(self, line: str) -> str:
+        """Command that removes a configuration line"""
+        prefix = f"{self.negate} "
+        if line.startswith(prefix):
+            return line[len(prefix):]
+        return prefix + line
+
+    def command_errors(self, output: str) -> List[str]:
+        """
+        Commands the device rejected in a config session transcript, each
+        as 'command: error'. The command is the nearest line echoed before
+        the error, skipping the '^' position marker.
+        """
+        errors = []
+        previous = ''
+        for line in output.splitlines():
+            stripped = line.strip()
+            if stripped.startswith(self.error_prefix):
+                errors.append(f"{previous}: {stripped}" if previous else stripped)
+            elif stripped and stripped != '^':
+                previous = stripped
+        return errors
+
+
+# 3Com / H3C switches: '#' separators, 'undo' negation, 'quit' leaves a view
+COMWARE = Dialect('comware', ('#',), 'undo', 'quit', ignore_prefixes=('return', 'version'))
+
+# Aruba APs and controllers: '!' separators, 'no' negation, 'exit' leaves a context
+ARUBAOS = Dialect('arubaos', ('!',), 'no', 'exit', ignore_prefixes=('version', 'end'))
+
+
+def parse_config(text: str, dialect: Dialect) -> 'OrderedDict[str, List[str]]':
+    """
+    Split a config into {stanza header: [child lines]}.
+
+    A line indented no deeper than the current stanza header starts a new
+    stanza, and deeper lines are its children. A comment separator ends
+    the current stanza, so Comware globals such as ' sysname X' and
+    ' ftp server enable' inside one '#' block are sibling single-line
+    stanzas. Children of nested views (e.g. an OSPF area) keep one
+    leading space per level below the stanza's first child level.
+    """
+    stanzas = OrderedDict()
+    current = None
+    base = 0
+    levels = []
+
+    for raw_line in text.splitlines():
+        line = raw_line.rstrip()
+        stripped = line.strip()
+
+        if not stripped:
+            continue
+        if stripped.startswith(dialect.comment_prefixes):
+            current = None
+            continue
+        if stripped.startswith(dialect.ignore_prefixes):
+            continue
+
+        indent = len(line) - len(stripped)
+        if current is None or indent <= base:
+            current = stripped
+            base = indent
+            levels = []
+            stanzas.setdefault(current, [])
+        else:
+            # Indentation of each open nested view below the header
+            while levels and levels[-1] >= indent:
+                levels.pop()
+            levels.append(indent)
+            stanzas[current].append(' ' * (len(levels) - 1) + stripped)
+
+    return stanzas
+
+
+def split_blocks(lines: List[str]) -> 'OrderedDict[str, List[str]]':
+    """Group child lines into {line: [its nested lines, one level shallower]}"""
+    blocks = OrderedDict()
+    current = None
+    for line in lines:
+        if line.startswith(' ') and current is not None:
+            blocks[current].append(line[1:])
+        else:
+            current = line
+            blocks.setdefault(current, [])
+    return blocks
+
+
+def normalize_config(text: str, dialect: Dialect) -> str:
+    """Canonical text of a config, ignoring comments and whitespace"""
+    lines = []
+    for header, children in parse_config(text, dialect).items():
+        lines.append(header)
+        lines.extend(f" {child}" for child in children)
+    return '\n'.join(lines)
+
+
+def config_hash(text: str, dialect: Dialect) -> str:
+    """SHA-256 of the normalized config, for cheap change detection"""
+    return hashlib.sha256(normalize_config(text, dialect).encode('utf-8')).hexdigest()
+
+
+class ConfigDiff:
+    """Stanza-level difference between a running and a target config"""
+
+    def __init__(self, running: 'OrderedDict[str, List[str]]',
+                 target: 'OrderedDict[str, List[str]]', dialect: Dialect,
+                 replace: bool = True):
+        self.dialect = dialect
+        self.replace = replace
+        self.running = running
+        self.target = target
+        self.added = OrderedDict()
+        self.removed = OrderedDict()
+        self.changed = OrderedDict()
+
+        for header, children in target.items():
+            if header not in running:
+                self.added[header] = children
+            elif children != running[header]:
+                # With replace=False, a stanza that only lacks lines the
+                # target leaves out is not a change
+                if self._view_commands(split_blocks(running[header]), split_blocks(children)):
+                    self.changed[header] = children
+
+        if replace:
+            for header, children in running.items():
+                if header not in target:
+                    self.removed[header] = children
+
+    def is_empty(self) -> bool:
+        """True when the running config already matches the target"""
+        return not (self.added or self.removed or self.changed)
+
+    def summary(self) -> Dict:
+        """Counts and headers of the changed stanzas"""
+        return {
+            'added': list(self.added),
+            'removed': list(self.removed),
+            'changed': list(self.changed),
+            'stanzas_changed': len(self.added) + len(self.removed) + len(self.changed)
+        }
+
+    def to_commands(self) -> List[str]:
+        """CLI commands that apply this diff, in configuration mode"""
+        return self._view_commands(self.running, self.target)
+
+    def _view_commands(self, running: 'OrderedDict[str, List[str]]',
+                       target: 'OrderedDict[str, List[str]]') -> List[str]:
+        """Commands that turn the running blocks of one view into the target blocks"""
+        negate_line = self.dialect.negate_line
+        removed = [header for header in running if header not in target] if self.replace else []
+
+        # Single-line settings are undone first so that a replacement such
+        # as 'sysname A' -> 'sysname B' is not reset by a later undo
+        commands = [negate_line(header) for header in removed if not running[header]]
+
+        for header, children in target.items():
+            if header not in running:
+                commands.extend(self._enter(header, self._view_commands(
+                    OrderedDict(), split_blocks(children))))
+            elif children != running[header]:
+                changes = self._view_commands(split_blocks(running[header]), split_blocks(children))
+                if changes:
+                    commands.extend(self._enter(header, changes))
+
+        # Remove whole sections last, in reverse order: their children
+        # first, since not every view can be removed by undoing its header
+        for header in reversed(removed):
+            if running[header]:
+                commands.extend(self._enter(header, self._view_commands(
+                    split_blocks(running[header]), OrderedDict())))
+                commands.append(negate_line(header))
+
+        return commands
+
+    def _enter(self, header: str, commands: List[str]) -> List[str]:
+        """Run commands inside the view opened by header and leave it again"""
+        if not commands:
+            return [header]
+        return [header, *commands, self.dialect.exit_command]
+
+
+def diff_configs(running_text: str, target_text: str, dialect: Dialect,
+                 replace: bool = True) -> ConfigDiff:
+    """
+    Diff two configs. With replace=False the target is treated as a
+    partial config: stanzas and lines missing from it are left alone.
+    """
+    return ConfigDiff(parse_config(running_text, dialect),
+                      parse_config(target_text, dialect),
+                      dialect, replace)
+
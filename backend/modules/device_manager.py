@@ -14,29 +14,79 @@ Supports multiple protocols:
 
 import json
 import os
+import copy
 import time
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+from collections import OrderedDict
 import ipaddress
 import socket
+import queue
 import threading
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from discovery import AsyncDiscoveryEngine
+from snmp_session import DEFAULT_RETRIES, DEFAULT_TIMEOUT, get_session
+from ssh_pool import SshSessionPool
+from backup_jobs import FleetBackupJob
+from backup_store import BackupStore
+from config_diff import ARUBAOS, COMWARE, config_hash, diff_configs
 
 try:
-    from pysnmp.hlapi import *
     from netmiko import ConnectHandler
     import requests
 except ImportError as e:
     logging.error(f"Required libraries not installed: {e}")
     logging.info("Please run: pip install -r requirements.txt")
 
+# MIB-II system group scalars fetched in one GET during discovery
+SYSTEM_OIDS = {
+    'hostname': '1.3.6.1.2.1.1.5.0',    # sysName
+    'description': '1.3.6.1.2.1.1.1.0', # sysDescr
+    'uptime': '1.3.6.1.2.1.1.3.0',      # sysUpTime
+    'location': '1.3.6.1.2.1.1.6.0'     # sysLocation
+}
+
+# IF-MIB ifTable/ifXTable columns, both indexed by ifIndex
+INTERFACE_COLUMNS = {
+    'descr': '1.3.6.1.2.1.2.2.1.2',          # ifDescr
+    'speed': '1.3.6.1.2.1.2.2.1.5',          # ifSpeed (bps)
+    'oper_status': '1.3.6.1.2.1.2.2.1.8',    # ifOperStatus
+    'name': '1.3.6.1.2.1.31.1.1.1.1',        # ifName
+    'high_speed': '1.3.6.1.2.1.31.1.1.1.15', # ifHighSpeed (Mbps)
+    'alias': '1.3.6.1.2.1.31.1.1.1.18',      # ifAlias
+    'duplex': '1.3.6.1.2.1.10.7.2.1.19'      # dot3StatsDuplexStatus
+}
+
+# AI-AP-MIB aiClientTable columns, indexed by client MAC
+ARUBA_CLIENT_COLUMNS = {
+    'mac': '1.3.6.1.4.1.14823.2.3.3.1.2.4.1.1',     # aiClientMACAddress
+    'ip': '1.3.6.1.4.1.14823.2.3.3.1.2.4.1.3',      # aiClientIPAddress
+    'name': '1.3.6.1.4.1.14823.2.3.3.1.2.4.1.5',    # aiClientName
+    'snr': '1.3.6.1.4.1.14823.2.3.3.1.2.4.1.7'      # aiClientSNR
+}
+
+DUPLEX_STATUS = {1: 'unknown', 2: 'half', 3: 'full'}
+
 class DeviceManager:
     """Main device management class"""
     
     def __init__(self, config_file='../config/devices.json'):
         self.config_file = config_file
         self.devices = {}
+        self.discovery_config = {}
+        self.polling_config = {}
+        self.backup_settings = {}
+        self.poll_executor = None
+        self.status_cache = {}
+        self.status_version = 0
+        self.managers = {}
+        self.backup_jobs = OrderedDict()
+        self.backup_locks = {}
+        self.backup_store = None
+        self.baseline_hashes = {}
+        self.refresh_lock = threading.Lock()
         self.device_types = {
             'aruba_ap500': ArubaAP500Manager,
             '3com_switch': ThreeComSwitchManager
@@ -58,7 +108,11 @@ class DeviceManager:
                 with open(self.config_file, 'r') as f:
                     config = json.load(f)
                     self.devices = config.get('devices', {})
+                    self.discovery_config = config.get('discovery', {})
+                    self.polling_config = config.get('polling', {})
+                    self.backup_settings = config.get('backup', {})
                 logging.info(f"Loaded {len(self.devices)} devices from config")
+                self.prune_device_managers()
             except Exception as e:
                 logging.error(f"Error loading device config: {e}")
         else:
@@ -103,7 +157,18 @@ class DeviceManager:
                 "enabled": True,
                 "networks": ["192.168.1.0/24"],
                 "scan_ports": [22, 161, 443, 80],
-                "timeout": 5
+                "timeout": 5,
+                "probe_timeout": 2,
+                "probe_ports": [22, 80],
+                "concurrent_probes": 1000,
+                "concurrent_scans": 20,
+                "snmp_timeout": 1,
+                "snmp_retries": 1
+            },
+            "polling": {
+                "max_workers": 16,
+                "request_timeout": 10,
+                "cache_ttl": 90
             }
         }
         
@@ -114,11 +179,25 @@ class DeviceManager:
             json.dump(default_config, f, indent=2)
         
         self.devices = default_config['devices']
+        self.discovery_config = default_config['discovery']
+        self.polling_config = default_config['polling']
         logging.info("Created default device configuration")
         
-    def get_all_devices(self) -> List[Dict]:
-        """Get all configured devices with their status"""
+    def get_all_devices(self, timeout: Optional[float] = None) -> List[Dict]:
+        """
+        Get all configured devices with their status
+        
+        Devices are polled concurrently on a bounded worker pool. Devices that
+        have not answered within timeout seconds (polling.request_timeout by
+        default) are returned with status 'timeout' instead of delaying the
+        whole response.
+        """
+        if timeout is None:
+            timeout = self.polling_config.get('request_timeout', 10)
+            
         devices_list = []
+        pending = {}
+        executor = self._get_poll_executor()
         
         for device_id, device_config in self.devices.items():
             device_info = device_config.copy()
@@ -127,51 +206,204 @@ class DeviceManager:
             # Get device manager instance
             manager = self.get_device_manager(device_id)
             if manager:
+                pending[executor.submit(manager.get_status)] = device_info
+            else:
+                device_info['status'] = 'unknown'
+                
+            devices_list.append(device_info)
+        
+        done, not_done = wait(pending, timeout=timeout)
+        
+        for future, device_info in pending.items():
+            if future in done:
                 try:
-                    status = manager.get_status()
-                    device_info.update(status)
+                    device_info.update(future.result())
                 except Exception as e:
                     device_info['status'] = 'error'
                     device_info['error'] = str(e)
             else:
+                # Drop queued polls; running ones finish in the background
+                future.cancel()
+                device_info['status'] = 'timeout'
+                device_info['error'] = f"No response within {timeout}s"
+        
+        if not_done:
+            logging.warning(f"{len(not_done)} devices did not answer within {timeout}s")
+            
+        return devices_list
+    
+    def poll_device(self, device_id: str, timeout: Optional[float] = None) -> Dict:
+        """
+        Get the live status of one device on the calling thread, reporting
+        status 'timeout' when it takes longer than timeout seconds
+        (polling.request_timeout by default)
+        
+        The deadline starts with the poll itself, and the shared poll
+        executor is not used, so a fleet refresh or other slow devices
+        cannot make a healthy device time out. The caller's worker pool
+        bounds concurrency. The result is also published to the status
+        cache, so the monitor's per-device polls keep /api/devices current.
+        """
+        if timeout is None:
+            timeout = self.polling_config.get('request_timeout', 10)
+            
+        manager = self.get_device_manager(device_id)
+        if not manager:
+            return {'status': 'unknown'}
+            
+        started = time.monotonic()
+        try:
+            status = manager.get_status()
+        except Exception as e:
+            status = {'status': 'error', 'error': str(e)}
+            
+        elapsed = time.monotonic() - started
+        if elapsed > timeout:
+            status = {'status': 'timeout', 'error': f"No response within {timeout}s (took {elapsed:.1f}s)"}
+            
+        self._cache_status(device_id, status)
+        return status
+    
+    def get_cached_status(self, fresh: bool = False) -> Tuple[int, List[Dict]]:
+        """
+        Get all devices from the status cache filled by poll_device, and the
+        cache version they were read at
+        
+        Only enabled devices are listed, the same devices the monitor polls.
+        Each entry carries age_seconds since it was polled; devices not
+        polled yet are listed with status 'unknown'. The cache is refreshed
+        synchronously when fresh is True, or when it is empty or no device
+        has been polled for polling.cache_ttl seconds (e.g. the monitor is
+        not running).
+        """
+        with self.lock:
+            cache, version = self.status_cache, self.status_version
+        
+        now = time.time()
+        if fresh or self._cache_stale(cache, now):
+            cache, version = self.refresh_device_status()
+            now = time.time()
+        
+        devices_list = []
+        for device_id, device_config in list(self.devices.items()):
+            if not device_config.get('enabled', True):
+                continue
+            if device_id not in cache:
+                device_info = device_config.copy()
+                device_info['id'] = device_id
                 device_info['status'] = 'unknown'
-                
+                devices_list.append(device_info)
+                continue
+            device_info, polled_at = cache[device_id]
+            device_info = device_info.copy()
+            device_info['age_seconds'] = round(now - polled_at, 1)
             devices_list.append(device_info)
             
-        return devices_list
+        return version, devices_list
+    
+    def get_status_version(self) -> Optional[int]:
+        """
+        Version of the status cache, bumped on every update, or None when
+        the cache is stale and the next read would poll the devices again
+        """
+        with self.lock:
+            cache, version = self.status_cache, self.status_version
+        return None if self._cache_stale(cache, time.time()) else version
+    
+    def _cache_stale(self, cache: Dict, now: float) -> bool:
+        ttl = self.polling_config.get('cache_ttl', 90)
+        return not cache or now - max(polled_at for _, polled_at in cache.values()) > ttl
+    
+    def refresh_device_status(self) -> Tuple[Dict, int]:
+        """Poll every device and publish the results to the status cache"""
+        # Concurrent callers wait for one refresh instead of each polling
+        with self.refresh_lock:
+            polled_at = time.time()
+            cache = {device['id']: (device, polled_at) for device in self.get_all_devices()}
+            
+            with self.lock:
+                self.status_cache = cache
+                self.status_version += 1
+                version = self.status_version
+                
+        return cache, version
+    
+    def _cache_status(self, device_id: str, status: Dict):
+        """Publish one device's poll result to the status cache"""
+        device_config = self.devices.get(device_id)
+        if device_config is None or not device_config.get('enabled', True):
+            return
+        device_info = device_config.copy()
+        device_info['id'] = device_id
+        device_info.update(status)
+        
+        with self.lock:
+            # Copy on write, so readers can use the cache without the lock
+            cache = dict(self.status_cache)
+            cache[device_id] = (device_info, time.time())
+            self.status_cache = cache
+            self.status_version += 1
+    
+    def _get_poll_executor(self) -> ThreadPoolExecutor:
+        """Shared worker pool for concurrent device polling"""
+        with self.lock:
+            if self.poll_executor is None:
+                self.poll_executor = ThreadPoolExecutor(
+                    max_workers=self.polling_config.get('max_workers', 16),
+                    thread_name_prefix='device-poll')
+            return self.poll_executor
     
     def get_device_manager(self, device_id: str):
-        """Get device manager instance for a specific device"""
+        """
+        Get the long-lived device manager instance for a specific device
+        
+        Managers are kept per device_id so their sessions and caches survive
+        across requests. An entry is rebuilt only when that device's config
+        changes.
+        """
         if device_id not in self.devices:
             return None
             
         device_config = self.devices[device_id]
         device_type = device_config.get('type')
         
-        if device_type in self.device_types:
-            return self.device_types[device_type](device_config)
+        if device_type not in self.device_types:
+            return None
         
-        return None
+        stale = None
+        with self.lock:
+            entry = self.managers.get(device_id)
+            if entry and entry[0] == device_config:
+                return entry[1]
+            
+            manager = self.device_types[device_type](device_config)
+            # Keep a private copy so in-place config edits are detected
+            self.managers[device_id] = (copy.deepcopy(device_config), manager)
+            if entry:
+                stale = entry[1]
+        
+        if stale:
+            logging.info(f"Configuration for {device_id} changed, rebuilt its manager")
+            stale.close()
+            
+        return manager
+    
+    def prune_device_managers(self):
+        """Close managers for devices that are no longer configured"""
+        with self.lock:
+            removed = [device_id for device_id in self.managers if device_id not in self.devices]
+            stale = [self.managers.pop(device_id)[1] for device_id in removed]
+            
+        for manager in stale:
+            manager.close()
     
     def discover_devices(self, network_range: str = "192.168.1.0/24") -> List[Dict]:
         """Discover devices on the network"""
         discovered_devices = []
         
         try:
-            network = ipaddress.IPv4Network(network_range, strict=False)
-            
-            # Use ThreadPoolExecutor for concurrent scanning
-            with ThreadPoolExecutor(max_workers=20) as executor:
-                futures = []
-                
-                for ip in network.hosts():
-                    future = executor.submit(self._scan_device, str(ip))
-                    futures.append(future)
-                
-                for future in futures:
-                    result = future.result()
-                    if result:
-                        discovered_devices.append(result)
+            engine = self._create_discovery_engine()
+            discovered_devices = engine.discover(network_range)
                         
         except Exception as e:
             logging.error(f"Error during device discovery: {e}")
@@ -179,111 +411,147 @@ class DeviceManager:
         logging.info(f"Discovered {len(discovered_devices)} devices")
         return discovered_devices
     
-    def _scan_device(self, ip: str, timeout: int = 2) -> Optional[Dict]:
-        """Scan a single IP for device presence and type"""
-        try:
-            # Check if device responds to ping
-            if not self._ping_device(ip, timeout):
-                return None
-                
-            device_info = {
-                'ip': ip,
-                'status': 'online',
-                'discovered_at': datetime.now().isoformat()
-            }
-            
-            # Try to identify device type through SNMP
-            device_type = self._identify_device_type(ip)
-            if device_type:
-                device_info['type'] = device_type
-                device_info['name'] = f"Auto-discovered {device_type}"
-                
-            # Try to get additional info via SNMP
-            snmp_info = self._get_snmp_info(ip)
-            if snmp_info:
-                device_info.update(snmp_info)
-                
-            return device_info
-            
-        except Exception as e:
-            logging.debug(f"Error scanning {ip}: {e}")
-            return None
+    def stream_discover_devices(self, network_range: str = "192.168.1.0/24"):
+        """
+        Discover devices, yielding records as hosts are identified.
+        
+        Yields {'type': 'device', 'device': {...}} for every discovered host
+        and ends with a single {'type': 'summary', ...} record. The network
+        range is validated up front so bad input raises before streaming.
+        """
+        network = ipaddress.IPv4Network(network_range, strict=False)
+        return self._stream_discovery(network)
     
-    def _ping_device(self, ip: str, timeout: int = 2) -> bool:
-        """Check if device is reachable"""
-        try:
-            sock = socket.create_connection((ip, 22), timeout)
-            sock.close()
-            return True
-        except:
+    def _stream_discovery(self, network: ipaddress.IPv4Network):
+        """Run the discovery engine in the background and relay its results"""
+        results = queue.Queue()
+        cancel = threading.Event()
+        finished = object()
+        engine = self._create_discovery_engine()
+        started = time.time()
+        errors = []
+        
+        def run():
             try:
-                sock = socket.create_connection((ip, 80), timeout)
-                sock.close()
-                return True
-            except:
-                return False
-    
-    def _identify_device_type(self, ip: str) -> Optional[str]:
-        """Identify device type using SNMP system description"""
+                engine.discover(str(network), on_result=results.put, cancel=cancel)
+            except Exception as e:
+                logging.error(f"Error during device discovery: {e}")
+                errors.append(str(e))
+            finally:
+                results.put(finished)
+        
+        threading.Thread(target=run, daemon=True).start()
+        
+        count = 0
+        identified = 0
         try:
-            for (errorIndication, errorStatus, errorIndex, varBinds) in nextCmd(
-                SnmpEngine(),
-                CommunityData('public'),
-                UdpTransportTarget((ip, 161)),
-                ContextData(),
-                ObjectType(ObjectIdentity('1.3.6.1.2.1.1.1.0')),  # sysDescr
-                lexicographicMode=False,
-                maxRows=1):
-                
-                if errorIndication or errorStatus:
+            while True:
+                device = results.get()
+                if device is finished:
                     break
-                    
-                for varBind in varBinds:
-                    name, val = varBind
-                    sys_descr = str(val).lower()
-                    
-                    # Identify Aruba devices
-                    if 'aruba' in sys_descr and 'ap' in sys_descr:
-                        return 'aruba_ap500'
-                    
-                    # Identify 3Com devices
-                    if '3com' in sys_descr or 'comware' in sys_descr:
-                        return '3com_switch'
-                        
-        except Exception as e:
-            logging.debug(f"Error identifying device type for {ip}: {e}")
+                count += 1
+                if device.get('type'):
+                    identified += 1
+                yield {'type': 'device', 'device': device}
+        finally:
+            # Stop scanning new hosts if the client went away mid-sweep
+            cancel.set()
+        
+        summary = {
+            'type': 'summary',
+            'success': not errors,
+            'network_range': str(network),
+            'hosts_scanned': max(network.num_addresses - 2, 1),
+            'count': count,
+            'identified': identified,
+            'elapsed_seconds': round(time.time() - started, 2)
+        }
+        if errors:
+            summary['error'] = errors[0]
+        
+        logging.info(f"Discovered {count} devices in {summary['elapsed_seconds']}s")
+        yield summary
+    
+    def _create_discovery_engine(self) -> AsyncDiscoveryEngine:
+        """Build a discovery engine from the 'discovery' config section"""
+        config = self.discovery_config
+        host_timeout = config.get('timeout', 5)
+        identify_timeout = config.get('identify_timeout', host_timeout)
+        
+        # Identification has to fit at least one unanswered SNMP request
+        snmp_wait = config.get('snmp_timeout', 1) * (config.get('snmp_retries', 1) + 1)
+        if snmp_wait >= identify_timeout:
+            logging.warning(f"discovery SNMP timeout ({snmp_wait}s with retries) is not shorter "
+                            f"than the identify timeout ({identify_timeout}s); hosts whose "
+                            f"agent does not answer will be returned unidentified")
+        
+        return AsyncDiscoveryEngine(
+            self._identify_host,
+            ports=config.get('probe_ports', [22, 80]),
+            max_concurrency=config.get('concurrent_probes', 1000),
+            connect_timeout=config.get('probe_timeout', 2),
+            host_timeout=host_timeout,
+            identify_workers=config.get('concurrent_scans', 20),
+            identify_timeout=identify_timeout
+        )
+    
+    def _identify_host(self, ip: str) -> Dict:
+        """Build the discovery result for a host known to be reachable"""
+        device_info = {
+            'ip': ip,
+            'status': 'online',
+            'discovered_at': datetime.now().isoformat()
+        }
+        
+        # One SNMP GET feeds both the type classifier and the info fields
+        snmp_info = self._get_snmp_info(ip)
+        
+        # Try to identify device type through SNMP
+        device_type = self._classify_device_type(snmp_info.get('description', ''))
+        if device_type:
+            device_info['type'] = device_type
+            device_info['name'] = f"Auto-discovered {device_type}"
+            
+        # Add additional info from SNMP
+        if snmp_info:
+            device_info.update(snmp_info)
+            
+        return device_info
+    
+    def _classify_device_type(self, sys_descr: str) -> Optional[str]:
+        """Map an SNMP sysDescr string to a supported device type"""
+        sys_descr = sys_descr.lower()
+        
+        # Identify Aruba devices
+        if 'aruba' in sys_descr and 'ap' in sys_descr:
+            return 'aruba_ap500'
+        
+        # Identify 3Com devices
+        if '3com' in sys_descr or 'comware' in sys_descr:
+            return '3com_switch'
             
         return None
     
+    def _discovery_snmp_session(self, ip: str):
+        """
+        SNMP session for identifying a discovered host, with the short
+        discovery.snmp_timeout and discovery.snmp_retries so a silent
+        agent cannot use up the per-host deadline
+        """
+        config = self.discovery_config
+        return get_session(ip, 'public',
+                           timeout=config.get('snmp_timeout', 1),
+                           retries=config.get('snmp_retries', 1))
+    
     def _get_snmp_info(self, ip: str) -> Dict:
-        """Get basic device information via SNMP"""
+        """Get basic device information via a single SNMP GET"""
         info = {}
         
         try:
-            # Get system information
-            oids = {
-                'hostname': '1.3.6.1.2.1.1.5.0',    # sysName
-                'description': '1.3.6.1.2.1.1.1.0', # sysDescr
-                'uptime': '1.3.6.1.2.1.1.3.0',      # sysUpTime
-                'location': '1.3.6.1.2.1.1.6.0'     # sysLocation
-            }
-            
-            for key, oid in oids.items():
-                for (errorIndication, errorStatus, errorIndex, varBinds) in nextCmd(
-                    SnmpEngine(),
-                    CommunityData('public'),
-                    UdpTransportTarget((ip, 161)),
-                    ContextData(),
-                    ObjectType(ObjectIdentity(oid)),
-                    lexicographicMode=False,
-                    maxRows=1):
-                    
-                    if not errorIndication and not errorStatus:
-                        for varBind in varBinds:
-                            name, val = varBind
-                            info[key] = str(val)
-                            break
-                    break
+            values = self._discovery_snmp_session(ip).get(SYSTEM_OIDS.values())
+            for key, oid in SYSTEM_OIDS.items():
+                if oid in values:
+                    info[key] = str(values[oid])
                     
         except Exception as e:
             logging.debug(f"Error getting SNMP info for {ip}: {e}")
@@ -312,24 +580,265 @@ class DeviceManager:
         if not manager:
             raise ValueError(f"Device {device_id} not found")
             
-        return manager.backup_config()
+        # One backup per device at a time, whether on demand or from a fleet job
+        with self._get_backup_lock(device_id):
+            result = manager.backup_config()
+            if not result.get('success'):
+                return result
+            
+            store = self._get_backup_store()
+            entry = store.save(device_id, result['config'], result['timestamp'])
+            store.prune(device_id, self.backup_settings.get('retention_count', 10))
+            
+        logging.info(f"Backed up configuration of {device_id} as {entry['backup_id']}"
+                     f"{' (unchanged)' if entry['deduplicated'] else ''}")
+        
+        entry.update({'success': True, 'device_id': device_id})
+        return entry
     
     def restore_device_config(self, device_id: str, backup_id: str) -> Dict:
         """Restore device configuration from backup"""
         manager = self.get_device_manager(device_id)
         if not manager:
             raise ValueError(f"Device {device_id} not found")
+        
+        config_text = self._get_backup_store().load(device_id, backup_id)
+        return manager.restore_config(backup_id, config_text)
+    
+    def check_config_drift(self, device_id: str) -> Dict:
+        """
+        Compare a device's running config with its latest backup
+        
+        Normalized hashes are compared first; the baseline is only loaded
+        and a full diff computed when the hashes differ.
+        """
+        manager = self.get_device_manager(device_id)
+        if not manager:
+            raise ValueError(f"Device {device_id} not found")
+            
+        store = self._get_backup_store()
+        baseline = store.latest(device_id)
+        if not baseline:
+            return {'device_id': device_id, 'drifted': None, 'message': 'No backup to compare against'}
+            
+        dialect = manager.config_dialect
+        running = manager.get_running_config()
+        running_hash = config_hash(running, dialect)
+        
+        # Normalized baseline hashes are cached per blob, so an unchanged
+        # device costs one config read and one hash
+        cache_key = (baseline['hash'], dialect.name)
+        baseline_text = None
+        if cache_key not in self.baseline_hashes:
+            baseline_text = store.load(device_id, baseline['backup_id'])
+            self.baseline_hashes[cache_key] = config_hash(baseline_text, dialect)
+        baseline_hash = self.baseline_hashes[cache_key]
+        
+        result = {
+            'device_id': device_id,
+            'drifted': running_hash != baseline_hash,
+            'baseline_backup_id': baseline['backup_id'],
+            'baseline_hash': baseline_hash,
+            'running_hash': running_hash,
+            'checked_at': datetime.now().isoformat()
+        }
+        
+        if result['drifted']:
+            if baseline_text is None:
+                baseline_text = store.load(device_id, baseline['backup_id'])
+            result['diff'] = diff_configs(baseline_text, running, dialect).summary()
+            
+        return result
+    
+    def get_device_backups(self, device_id: str) -> List[Dict]:
+        """List stored backups of a device, newest first"""
+        if device_id not in self.devices:
+            raise ValueError(f"Device {device_id} not found")
+            
+        return self._get_backup_store().list_backups(device_id)
+    
+    def start_fleet_backup(self) -> Dict:
+        """
+        Start a backup of all enabled devices in the background
+        
+        Devices are backed up backup.max_parallel at a time. If a fleet backup
+        is already running its status is returned instead of starting another.
+        """
+        with self.lock:
+            for job in self.backup_jobs.values():
+                if job.state == 'running':
+                    return job.to_dict()
+                    
+            device_ids = [device_id for device_id, device_config in self.devices.items()
+                          if device_config.get('enabled', True)]
+            job = FleetBackupJob(
+                device_ids,
+                self.backup_device_config,
+                max_parallel=self.backup_settings.get('max_parallel', 8),
+                report_directory=os.path.join(self.get_backup_directory(), 'jobs'))
+            self.backup_jobs[job.job_id] = job
+            
+            # Keep status for the most recent jobs only
+            while len(self.backup_jobs) > 20:
+                self.backup_jobs.popitem(last=False)
+            
+            job.start()
+            
+        return job.to_dict()
+    
+    def get_backup_job(self, job_id: str) -> Dict:
+        """Get progress of a fleet backup job"""
+        with self.lock:
+            job = self.backup_jobs.get(job_id)
+            
+        if not job:
+            raise ValueError(f"Backup job {job_id} not found")
+            
+        return job.to_dict()
+    
+    def get_backup_jobs(self) -> List[Dict]:
+        """Get summaries of recent fleet backup jobs, newest first"""
+        with self.lock:
+            jobs = list(self.backup_jobs.values())
             
-        return manager.restore_config(backup_id)
+        summaries = []
+        for job in reversed(jobs):
+            summary = job.to_dict()
+            del summary['devices']
+            summaries.append(summary)
+        return summaries
+    
+    def _get_backup_lock(self, device_id: str) -> threading.Lock:
+        """Per-device lock serializing backups of the same device"""
+        with self.lock:
+            return self.backup_locks.setdefault(device_id, threading.Lock())
+    
+    def get_backup_directory(self) -> str:
+        """Backup directory, relative paths resolved against the project root"""
+        directory = self.backup_settings.get('backup_directory', './backups')
+        if os.path.isabs(directory):
+            return directory
+        project_root = os.path.join(os.path.dirname(os.path.abspath(self.config_file)), '..')
+        return os.path.normpath(os.path.join(project_root, directory))
+    
+    def _get_backup_store(self) -> BackupStore:
+        """Content-addressed backup store in the backup directory"""
+        with self.lock:
+            if self.backup_store is None:
+                self.backup_store = BackupStore(self.get_backup_directory())
+            return self.backup_store
 
 
 class BaseDeviceManager:
     """Base class for device managers"""
     
+    # netmiko driver and CLI details - overridden by subclasses
+    netmiko_device_type = 'generic'
+    show_config_command = 'show running-config'
+    config_dialect = ARUBAOS
+    
     def __init__(self, device_config: Dict):
         self.config = device_config
         self.ip = device_config['ip']
         self.name = device_config.get('name', 'Unknown Device')
+        self.ssh_pool = None
+        self._ssh_lock = threading.Lock()
+        
+    def _snmp_session(self):
+        """Shared SNMP session for this device's agent"""
+        return get_session(self.ip,
+                           self.config.get('snmp_community', 'public'),
+                           str(self.config.get('snmp_version', '2c')),
+                           self.config.get('snmp_timeout', DEFAULT_TIMEOUT),
+                           self.config.get('snmp_retries', DEFAULT_RETRIES))
+    
+    def _walk_table(self, columns: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """Walk SNMP table columns using the device's GETBULK settings"""
+        return self._snmp_session().walk_table(
+            columns, self.config.get('snmp_max_repetitions', 25))
+        
+    def _get_ssh_pool(self) -> SshSessionPool:
+        """Pooled SSH sessions for this device, created on first use"""
+        with self._ssh_lock:
+            if self.ssh_pool is None:
+                self.ssh_pool = SshSessionPool(
+                    {
+                        'device_type': self.config.get('ssh_device_type', self.netmiko_device_type),
+                        'host': self.ip,
+                        'port': self.config.get('ssh_port', 22),
+                        'username': self.config.get('ssh_username'),
+                        'password': self.config.get('ssh_password'),
+                        'conn_timeout': self.config.get('ssh_timeout', 10)
+                    },
+                    max_sessions=self.config.get('ssh_max_sessions', 2),
+                    idle_timeout=self.config.get('ssh_idle_timeout', 300))
+            return self.ssh_pool
+    
+    def get_running_config(self) -> str:
+        """Read the running configuration over SSH"""
+        with self._get_ssh_pool().session() as connection:
+            return connection.send_command(self.show_config_command)
+    
+    def _add_running_config(self, config: Dict) -> Dict:
+        """Attach the running configuration to a config dict when reachable"""
+        try:
+            config['running_config'] = self.get_running_config()
+        except Exception as e:
+            logging.debug(f"Error reading running config from {self.ip}: {e}")
+        return config
+    
+    def _apply_config(self, target_text: str, replace: bool = True, save: bool = True) -> Dict:
+        """
+        Move the device to a target config, pushing only changed stanzas
+        
+        With replace=False the target is a partial config and nothing
+        outside it is removed.
+        """
+        with self._get_ssh_pool().session() as connection:
+            running = connection.send_command(self.show_config_command)
+            diff = diff_configs(running, target_text, self.config_dialect, replace)
+            
+            if diff.is_empty():
+                return {'success': True, 'changed': False, 'commands_sent': 0, 'diff': diff.summary()}
+                
+            commands = diff.to_commands()
+            result = self._push_commands(connection, commands, save)
+            
+        result['changed'] = True
+        result['diff'] = diff.summary()
+        return result
+    
+    def _send_config(self, commands: List[str], save: bool = True) -> Dict:
+        """Push configuration commands over a pooled SSH session"""
+        with self._get_ssh_pool().session() as connection:
+            return self._push_commands(connection, commands, save)
+    
+    def _push_commands(self, connection, commands: List[str], save: bool) -> Dict:
+        """
+        Send commands in configuration mode and check the transcript for
+        rejected lines. A partly rejected change is not saved, so a reload
+        brings back the last saved configuration.
+        """
+        output = connection.send_config_set(commands)
+        errors = self.config_dialect.command_errors(output)
+        if errors:
+            logging.warning(f"{self.ip} rejected {len(errors)} of {len(commands)} commands")
+            return {
+                'success': False,
+                'commands_sent': len(commands),
+                'failed_commands': errors,
+                'message': f"Device rejected {len(errors)} commands; configuration not saved",
+                'output': output
+            }
+            
+        if save:
+            output += connection.save_config()
+        return {'success': True, 'commands_sent': len(commands), 'output': output}
+        
+    def close(self):
+        """Release per-device resources when the manager is retired"""
+        if self.ssh_pool:
+            self.ssh_pool.close()
         
     def get_status(self) -> Dict:
         """Get device status - to be implemented by subclasses"""
@@ -340,21 +849,48 @@ class BaseDeviceManager:
         return {}
         
     def update_config(self, config: Dict) -> Dict:
-        """Update device configuration - to be implemented by subclasses"""
-        return {'success': False, 'message': 'Not implemented'}
+        """
+        Apply a change over SSH
+        
+        Accepts {'config': text, 'replace': bool} to converge on a target
+        config (only changed stanzas are sent), or {'commands': [...]} to
+        send raw commands. Both take an optional 'save' flag.
+        """
+        if config.get('config'):
+            return self._apply_config(config['config'], config.get('replace', False),
+                                      config.get('save', True))
+            
+        commands = config.get('commands', [])
+        if not commands:
+            return {'success': False, 'message': 'No configuration commands supplied'}
+            
+        return self._send_config(commands, config.get('save', True))
         
     def backup_config(self) -> Dict:
-        """Backup device configuration - to be implemented by subclasses"""
-        return {'success': False, 'message': 'Not implemented'}
+        """Read the running configuration for backup"""
+        return {
+            'success': True,
+            'config': self.get_running_config(),
+            'timestamp': datetime.now().isoformat()
+        }
         
-    def restore_config(self, backup_id: str) -> Dict:
-        """Restore device configuration - to be implemented by subclasses"""
-        return {'success': False, 'message': 'Not implemented'}
+    def restore_config(self, backup_id: str, config_text: Optional[str] = None) -> Dict:
+        """Restore a backed-up configuration, pushing only what differs"""
+        if not config_text:
+            return {'success': False, 'message': f"Backup {backup_id} is empty"}
+            
+        result = self._apply_config(config_text, replace=True)
+        result['backup_id'] = backup_id
+        return result
 
 
 class ArubaAP500Manager(BaseDeviceManager):
     """Manager for Aruba AP 500 access points"""
     
+    netmiko_device_type = 'aruba_os'
+    show_config_command = 'show running-config'
+    config_dialect = ARUBAOS
+    
     def get_status(self) -> Dict:
         """Get AP status including wireless clients and performance"""
         status = {
@@ -403,28 +939,42 @@ class ArubaAP500Manager(BaseDeviceManager):
         except:
             return False
     
-    def _get_client_count(self) -> int:
-        """Get number of connected wireless clients"""
+    def _get_client_count(self) -> Optional[int]:
+        """Get number of connected wireless clients, or None when SNMP gives no answer"""
         try:
             # SNMP OID for wireless client count (generic)
-            for (errorIndication, errorStatus, errorIndex, varBinds) in nextCmd(
-                SnmpEngine(),
-                CommunityData(self.config.get('snmp_community', 'public')),
-                UdpTransportTarget((self.ip, 161)),
-                ContextData(),
-                ObjectType(ObjectIdentity('1.3.6.1.4.1.14823.2.2.1.1.3.2.0')),
-                lexicographicMode=False,
-                maxRows=1):
-                
-                if not errorIndication and not errorStatus:
-                    for varBind in varBinds:
-                        name, val = varBind
-                        return int(val)
+            value = self._snmp_session().get_scalar('1.3.6.1.4.1.14823.2.2.1.1.3.2.0')
+            if value is not None:
+                return int(value)
+            
+            # The agent answered but has no counter: count rows in the
+            # client table. An agent that did not answer raises instead,
+            # so an unreachable agent is not waited on twice.
+            return len(self._get_clients())
                         
         except Exception as e:
             logging.debug(f"Error getting client count: {e}")
             
-        return 0
+        return None
+    
+    def _get_clients(self) -> List[Dict]:
+        """Get associated wireless clients from the AP client table"""
+        clients = []
+        
+        try:
+            for index, row in self._walk_table(ARUBA_CLIENT_COLUMNS).items():
+                mac = row.get('mac')
+                clients.append({
+                    'mac': ':'.join(f"{octet:02x}" for octet in mac.asOctets()) if mac is not None else index,
+                    'ip': row['ip'].prettyPrint() if 'ip' in row else None,
+                    'name': str(row.get('name', '')),
+                    'snr': int(row['snr']) if 'snr' in row else None
+                })
+                
+        except Exception as e:
+            logging.debug(f"Error getting wireless clients: {e}")
+            
+        return clients
     
     def _get_ssids(self) -> List[Dict]:
         """Get configured SSIDs"""
@@ -482,7 +1032,7 @@ class ArubaAP500Manager(BaseDeviceManager):
     
     def get_config(self) -> Dict:
         """Get AP configuration"""
-        return {
+        return self._add_running_config({
             'device_info': {
                 'name': self.name,
                 'ip': self.ip,
@@ -502,12 +1052,17 @@ class ArubaAP500Manager(BaseDeviceManager):
                 'vlan': 1,
                 'ip_assignment': 'dhcp'
             }
-        }
+        })
 
 
 class ThreeComSwitchManager(BaseDeviceManager):
     """Manager for 3Com switches"""
     
+    # 3Com 4500-class switches run Comware
+    netmiko_device_type = 'hp_comware'
+    show_config_command = 'display current-configuration'
+    config_dialect = COMWARE
+    
     def get_status(self) -> Dict:
         """Get switch status including port information"""
         status = {
@@ -559,21 +1114,27 @@ class ThreeComSwitchManager(BaseDeviceManager):
         ports = {}
         
         try:
-            # Get interface status via SNMP
-            # This is a simplified example
-            for port in range(1, 25):  # Assuming 24 ports
-                ports[f"port_{port}"] = {
-                    'name': f"GigabitEthernet0/{port}",
-                    'status': 'up' if port <= 12 else 'down',
-                    'speed': '1000Mbps',
-                    'duplex': 'full',
-                    'vlan': 1 if port <= 20 else 10,
-                    'description': f"Port {port}"
+            # Walk ifTable/ifXTable with GETBULK, sized by the real port count
+            interfaces = self._walk_table(INTERFACE_COLUMNS)
+            for index, row in sorted(interfaces.items(), key=lambda item: int(item[0])):
+                if 'high_speed' in row:
+                    speed = int(row['high_speed'])
+                else:
+                    speed = int(row.get('speed', 0)) // 1000000
+                    
+                ports[f"port_{index}"] = {
+                    'name': str(row.get('name') or row.get('descr', f"ifIndex {index}")),
+                    'status': 'up' if int(row.get('oper_status', 2)) == 1 else 'down',
+                    'speed': f"{speed}Mbps",
+                    'duplex': DUPLEX_STATUS.get(int(row.get('duplex', 1)), 'unknown'),
+                    'description': str(row.get('alias', ''))
                 }
                 
         except Exception as e:
-            logging.debug(f"Error getting port status: {e}")
+            logging.debug(f"Error walking interface table: {e}")
+            ports = {}
             
+        # Empty when SNMP gave no data, so no port metrics are recorded
         return ports
     
     def _get_vlans(self) -> List[Dict]:
@@ -607,7 +1168,7 @@ class ThreeComSwitchManager(BaseDeviceManager):
     
     def get_config(self) -> Dict:
         """Get switch configuration"""
-        return {
+        return self._add_running_config({
             'device_info': {
                 'name': self.name,
                 'ip': self.ip,
@@ -626,4 +1187,4 @@ class ThreeComSwitchManager(BaseDeviceManager):
                 'ssh_enabled': True,
                 'telnet_enabled': False
             }
-        }
\ No newline at end of file
+        })
\ No newline at end of file
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Discovery Engine Module
+
+Asyncio-based network sweep used by DeviceManager.discover_devices:
+- Non-blocking TCP connect probes, thousands in flight at once
+- Configurable concurrency cap and per-host deadline; the cap is lowered
+  to fit the process's open file limit
+- Blocking SNMP identification offloaded to a small thread pool,
+  only for hosts that answered the probe, with its own deadline that
+  starts when a worker picks the host up
+"""
+
+import asyncio
+import errno
+import ipaddress
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+# File descriptors left for everything but the probes (SNMP sessions,
+# SSH pools, the database files, the web server)
+FD_HEADROOM = 128
+
+# Errors meaning we ran out of sockets, not that the port is closed
+FD_EXHAUSTED = (errno.EMFILE, errno.ENFILE)
+PROBE_RETRIES = 3
+
+
+class AsyncDiscoveryEngine:
+    """Concurrent host discovery over an IPv4 network range"""
+
+    def __init__(self, identify: Callable[[str], Dict],
+                 ports: Iterable[int] = (22, 80),
+                 max_concurrency: int = 1000,
+                 connect_timeout: float = 2.0,
+                 host_timeout: float = 5.0,
+                 identify_workers: int = 20,
+                 identify_timeout: Optional[float] = None):
+        """
+        identify is called from a worker thread for every reachable host and
+        must return the device info dict (same shape as DeviceManager._identify_host).
+        host_timeout bounds the probe; identify_timeout (host_timeout by
+        default) bounds identification, not counting the time a host
+        waits for a free identify worker.
+        """
+        self.identify = identify
+        self.ports = list(ports)
+        self.max_concurrency = self._fit_fd_limit(max(1, int(max_concurrency)))
+        self.connect_timeout = connect_timeout
+        self.host_timeout = host_timeout
+        self.identify_workers = max(1, int(identify_workers))
+        self.identify_timeout = identify_timeout or host_timeout
+
+    def discover(self, network_range: str,
+                 on_result: Optional[Callable[[Dict], None]] = None,
+                 cancel: Optional[threading.Event] = None) -> List[Dict]:
+        """Sweep a network range and return discovered devices sorted by IP"""
+        network = ipaddress.IPv4Network(network_range, strict=False)
+        results = asyncio.run(self.discover_async(network, on_result, cancel))
+        results.sort(key=lambda device: ipaddress.IPv4Address(device['ip']))
+        return results
+
+    async def discover_async(self, network: ipaddress.IPv4Network,
+                             on_result: Optional[Callable[[Dict], None]] = None,
+                             cancel: Optional[threading.Event] = None) -> List[Dict]:
+        """
+        Sweep a network with at most max_concurrency hosts in flight.
+        on_result is called for each device as soon as it is identified;
+        setting cancel stops the sweep before the next host is started.
+        """
+        results = []
+        hosts = (str(ip) for ip in network.hosts())
+        host_count = max(network.num_addresses - 2, 1)
+        executor = ThreadPoolExecutor(max_workers=self.identify_workers)
+
+        async def worker():
+            # All workers share one host iterator, so at most
+            # max_concurrency hosts are being probed at any time
+            for ip in hosts:
+                if cancel is not None and cancel.is_set():
+                    return
+                result = await self._scan_host(ip, executor)
+                if result:
+                    results.append(result)
+                    if on_result:
+                        on_result(result)
+
+        try:
+            workers = min(self.max_concurrency, host_count)
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        finally:
+            executor.shutdown(wait=False)
+
+        return results
+
+    async def _scan_host(self, ip: str, executor: ThreadPoolExecutor) -> Optional[Dict]:
+        """Probe a host and identify it, each step bounded by its own deadline"""
+        loop = asyncio.get_running_loop()
+
+        try:
+            reachable = await asyncio.wait_for(self._probe_host(ip), self.host_timeout)
+        except asyncio.TimeoutError:
+            return None
+
+        if not reachable:
+            return None
+
+        # The identify deadline starts once a worker picks the host up, so
+        # hosts queued behind a busy pool are not cut short
+        started = asyncio.Event()
+
+        def identify():
+            loop.call_soon_threadsafe(started.set)
+            return self.identify(ip)
+
+        try:
+            identified = loop.run_in_executor(executor, identify)
+            await started.wait()
+            return await asyncio.wait_for(identified, self.identify_timeout)
+        except asyncio.TimeoutError:
+            logging.debug(f"Identification of {ip} exceeded identify deadline")
+            return self._basic_info(ip)
+        except Exception as e:
+            logging.debug(f"Error identifying {ip}: {e}")
+            return self._basic_info(ip)
+
+    async def _probe_host(self, ip: str) -> bool:
+        """Return True as soon as any probe port accepts a connection"""
+        probes = [asyncio.ensure_future(self._probe_port(ip, port)) for port in self.ports]
+        try:
+            for probe in asyncio.as_completed(probes):
+                if await probe:
+                    return True
+        finally:
+            for probe in probes:
+                probe.cancel()
+        return False
+
+    async def _probe_port(self, ip: str, port: int) -> bool:
+        """
+        Non-blocking TCP connect probe. Running out of file descriptors is
+        retried after a short wait instead of being taken for a closed port.
+        """
+        for attempt in range(PROBE_RETRIES + 1):
+            try:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(ip, port), self.connect_timeout)
+                break
+            except asyncio.TimeoutError:
+                return False
+            except OSError as e:
+                if e.errno not in FD_EXHAUSTED:
+                    return False
+                if attempt == PROBE_RETRIES:
+                    logging.error(f"Could not probe {ip}:{port}, out of file descriptors: {e}")
+                    return False
+                await asyncio.sleep(0.1 * 2 ** attempt)
+
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+
+    def _fit_fd_limit(self, max_concurrency: int) -> int:
+        """Lower max_concurrency so every probe socket fits the open file limit"""
+        if resource is None:
+            return max_concurrency
+        try:
+            soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        except (OSError, ValueError):
+            return max_concurrency
+        if soft_limit == resource.RLIM_INFINITY:
+            return max_concurrency
+
+        # Each host in flight may hold one socket per probe port
+        fitting = max(1, (soft_limit - FD_HEADROOM) // max(len(self.ports), 1))
+        if fitting < max_concurrency:
+            logging.warning(f"Limiting discovery to {fitting} hosts in flight "
+                            f"(open file limit {soft_limit})")
+            return fitting
+        return max_concurrency
+
+    def _basic_info(self, ip: str) -> Dict:
+        """Minimal result for a reachable host that could not be identified"""
+        return {
+            'ip': ip,
+            'status': 'online',
+            'discovered_at': datetime.now().isoformat()
+        }
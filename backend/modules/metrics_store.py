@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Metrics Store Module
+
+Embedded time-series storage for monitoring samples:
+- SQLite database, one segment table per UTC day
+- Batched writes, one transaction per collection cycle
+- 1-minute, 5-minute and 1-hour rollups (min/max/avg/last) computed
+  incrementally as samples arrive
+- Range queries pick the coarsest tier that still resolves the window
+- Retention enforced by dropping whole expired segments
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SECONDS_PER_DAY = 86400
+
+# Rollup bucket sizes in seconds, finest first
+ROLLUP_TIERS = (60, 300, 3600)
+
+
+class MetricsStore:
+    """Day-segmented SQLite time-series store with rollup tiers"""
+
+    def __init__(self, path: str, retention_days: int = 30, raw_retention_days: int = 7):
+        self.path = path
+        self.retention_days = retention_days
+        self.raw_retention_days = min(raw_retention_days, retention_days)
+        self.lock = threading.Lock()
+
+        # (device_id, metric, tier) -> [bucket_start, min, max, sum, count, last]
+        self.open_buckets: Dict[Tuple[str, str, int], List] = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.segments = self._list_segments()
+
+    def write_batch(self, samples: Iterable[Tuple[str, str, int, float]]):
+        """Write (device_id, metric, timestamp, value) samples in one transaction"""
+        raw_rows: Dict[int, List[Tuple]] = {}
+        rollup_rows: Dict[Tuple[int, int], List[Tuple]] = {}
+
+        with self.lock:
+            for device_id, metric, timestamp, value in samples:
+                timestamp = int(timestamp)
+                value = float(value)
+                raw_rows.setdefault(timestamp // SECONDS_PER_DAY, []).append(
+                    (device_id, metric, timestamp, value))
+
+                for tier in ROLLUP_TIERS:
+                    for row in self._update_rollup(device_id, metric, tier, timestamp, value):
+                        rollup_rows.setdefault((tier, row[2] // SECONDS_PER_DAY), []).append(row)
+
+            if not raw_rows:
+                return
+
+            with self.conn:
+                for day, rows in raw_rows.items():
+                    table = self._ensure_segment(0, day)
+                    self.conn.executemany(
+                        f'INSERT INTO {table} (device_id, metric, ts, value) VALUES (?, ?, ?, ?)',
+                        rows)
+                for (tier, day), rows in rollup_rows.items():
+                    self._upsert_rollups(tier, day, rows)
+
+    def query_range(self, device_id: str, metric: str, start: Optional[int] = None,
+                    end: Optional[int] = None, max_points: int = 300) -> Dict:
+        """
+        Samples of one metric in [start, end] at the coarsest resolution that
+        still yields about max_points points and covers the whole window.
+
+        Returns {'resolution': seconds (0 for raw), 'points': [(ts, avg, min, max, last)]}.
+        """
+        now = time.time()
+        end = int(end if end is not None else now)
+        start = int(start if start is not None else end - 3600)
+        wanted = max((end - start) / max(max_points, 1), 1)
+
+        resolution = 0
+        for tier in ROLLUP_TIERS:
+            if tier > wanted:
+                break
+            resolution = tier
+        # Fall back to coarser tiers when the finer one has aged out
+        while resolution != ROLLUP_TIERS[-1] and start < now - self._retention(resolution) * SECONDS_PER_DAY:
+            resolution = ROLLUP_TIERS[ROLLUP_TIERS.index(resolution) + 1] if resolution else ROLLUP_TIERS[0]
+
+        with self.lock:
+            if resolution == 0:
+                rows = self._select(0, 'SELECT ts, value', device_id, metric, start, end)
+                points = [(ts, value, value, value, value) for ts, value in rows]
+            else:
+                rows = self._select(resolution, 'SELECT ts, min, max, sum, count, last',
+                                    device_id, metric, start, end)
+                points = [(ts, total / count, low, high, last)
+                          for ts, low, high, total, count, last in self._with_open_bucket(
+                              rows, device_id, metric, resolution, start, end)]
+
+        return {'resolution': resolution, 'points': points}
+
+    def drop_expired(self, now: Optional[float] = None) -> int:
+        """Drop day segments entirely older than their tier's retention window"""
+        now = now if now is not None else time.time()
+        dropped = 0
+
+        with self.lock:
+            with self.conn:
+                for tier, days in self.segments.items():
+                    oldest_day = int(now - self._retention(tier) * SECONDS_PER_DAY) // SECONDS_PER_DAY
+                    for day in sorted(day for day in days if day < oldest_day):
+                        self.conn.execute(f'DROP TABLE IF EXISTS {self._segment_name(tier, day)}')
+                        days.discard(day)
+                        dropped += 1
+
+        if dropped:
+            logging.info(f"Dropped {dropped} expired metric segments")
+        return dropped
+
+    def close(self):
+        """Persist partially filled rollup buckets and close the database"""
+        with self.lock:
+            rollup_rows: Dict[Tuple[int, int], List[Tuple]] = {}
+            for (device_id, metric, tier), bucket in self.open_buckets.items():
+                rollup_rows.setdefault((tier, bucket[0] // SECONDS_PER_DAY), []).append(
+                    (device_id, metric, *bucket))
+            self.open_buckets.clear()
+
+            with self.conn:
+                for (tier, day), rows in rollup_rows.items():
+                    self._upsert_rollups(tier, day, rows)
+            self.conn.close()
+
+    def _update_rollup(self, device_id: str, metric: str, tier: int,
+                       timestamp: int, value: float) -> List[Tuple]:
+        """Fold a sample into its open bucket; return rows ready to persist"""
+        key = (device_id, metric, tier)
+        bucket_start = timestamp - timestamp % tier
+        bucket = self.open_buckets.get(key)
+
+        if bucket is not None and bucket[0] == bucket_start:
+            bucket[1] = min(bucket[1], value)
+            bucket[2] = max(bucket[2], value)
+            bucket[3] += value
+            bucket[4] += 1
+            bucket[5] = value
+            return []
+
+        if bucket is not None and bucket_start < bucket[0]:
+            # Late sample for an already closed bucket, merged on upsert
+            return [(device_id, metric, bucket_start, value, value, value, 1, value)]
+
+        self.open_buckets[key] = [bucket_start, value, value, value, 1, value]
+        if bucket is None:
+            return []
+        return [(device_id, metric, *bucket)]
+
+    def _upsert_rollups(self, tier: int, day: int, rows: List[Tuple]):
+        """Insert rollup rows, merging into existing buckets (caller holds self.lock)"""
+        table = self._ensure_segment(tier, day)
+        self.conn.executemany(
+            f'INSERT INTO {table} (device_id, metric, ts, min, max, sum, count, last) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (device_id, metric, ts) DO UPDATE SET '
+            'min = MIN(min, excluded.min), max = MAX(max, excluded.max), '
+            'sum = sum + excluded.sum, count = count + excluded.count, last = excluded.last',
+            rows)
+
+    def _with_open_bucket(self, rows: List[Tuple], device_id: str, metric: str,
+                          tier: int, start: int, end: int) -> List[Tuple]:
+        """Append the in-progress bucket so recent windows are complete"""
+        bucket = self.open_buckets.get((device_id, metric, tier))
+        if bucket is None or not start <= bucket[0] <= end:
+            return rows
+
+        low, high, total, count, last = bucket[1:]
+        if rows and rows[-1][0] == bucket[0]:
+            # Partial bucket persisted at shutdown, then reopened
+            _, old_low, old_high, old_total, old_count, _ = rows.pop()
+            low, high = min(low, old_low), max(high, old_high)
+            total, count = total + old_total, count + old_count
+
+        rows.append((bucket[0], low, high, total, count, last))
+        return rows
+
+    def _select(self, tier: int, columns: str, device_id: str, metric: str,
+                start: int, end: int) -> List[Tuple]:
+        """Run a range query across the day segments of a tier (caller holds self.lock)"""
+        rows = []
+        days = self.segments.get(tier, set())
+        # Include the bucket the window starts in
+        if tier:
+            start -= start % tier
+        for day in range(start // SECONDS_PER_DAY, end // SECONDS_PER_DAY + 1):
+            if day not in days:
+                continue
+            rows.extend(self.conn.execute(
+                f'{columns} FROM {self._segment_name(tier, day)} '
+                'WHERE device_id = ? AND metric = ? AND ts BETWEEN ? AND ? ORDER BY ts',
+                (device_id, metric, start, end)).fetchall())
+        return rows
+
+    def _retention(self, tier: int) -> int:
+        """Days of history kept for a tier"""
+        if tier in (0, ROLLUP_TIERS[0]):
+            return self.raw_retention_days
+        return self.retention_days
+
+    def _segment_name(self, tier: int, day: int) -> str:
+        if tier == 0:
+            return f'samples_{day}'
+        return f'rollup{tier}_{day}'
+
+    def _ensure_segment(self, tier: int, day: int) -> str:
+        """Create a day segment on first write (caller holds self.lock)"""
+        table = self._segment_name(tier, day)
+        days = self.segments.setdefault(tier, set())
+        if day not in days:
+            if tier == 0:
+                self.conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} ('
+                    'device_id TEXT NOT NULL, metric TEXT NOT NULL, '
+                    'ts INTEGER NOT NULL, value REAL NOT NULL)')
+                self.conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS {table}_lookup ON {table} (device_id, metric, ts)')
+            else:
+                self.conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} ('
+                    'device_id TEXT NOT NULL, metric TEXT NOT NULL, ts INTEGER NOT NULL, '
+                    'min REAL NOT NULL, max REAL NOT NULL, sum REAL NOT NULL, '
+                    'count INTEGER NOT NULL, last REAL NOT NULL, '
+                    'PRIMARY KEY (device_id, metric, ts))')
+            days.add(day)
+        return table
+
+    def _list_segments(self) -> Dict[int, set]:
+        """Segment days already on disk, by tier"""
+        segments = {0: set()}
+        segments.update({tier: set() for tier in ROLLUP_TIERS})
+
+        rows = self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        for (name,) in rows:
+            prefix, _, day = name.partition('_')
+            if not day.isdigit():
+                continue
+            if prefix == 'samples':
+                segments[0].add(int(day))
+            elif prefix.startswith('rollup') and prefix[len('rollup'):].isdigit():
+                segments.setdefault(int(prefix[len('rollup'):]), set()).add(int(day))
+        return segments
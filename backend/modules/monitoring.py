@@ -11,37 +11,144 @@ Provides real-time monitoring capabilities for network devices:
 Supports both polling and event-based monitoring
 """
 
+import os
 import time
 import logging
 import threading
 import json
+import queue
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
-from collections import deque
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Any, Mapping, NamedTuple, Optional
 import schedule
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics_store import MetricsStore
+from ring_buffer import MetricRingBuffer
+from alert_engine import AlertEngine, Incident, build_alert_rules
+from alert_store import AlertStore
+from poll_scheduler import PollScheduler
+
+# Metrics kept in the in-memory history of each device
+HISTORY_METRICS = ('cpu_usage', 'memory_usage', 'temperature', 'client_count')
+HISTORY_LENGTH = 60  # Last 60 measurements
+
+# Deltas a live-update subscriber may fall behind by before it is dropped
+SUBSCRIBER_BACKLOG = 100
+
+# Dashboard labels of the monitored device types
+DEVICE_TYPE_LABELS = {
+    'aruba_ap500': 'Aruba AP',
+    '3com_switch': '3Com Switch'
+}
+
+class MonitorSnapshot(NamedTuple):
+    """
+    Read-only view of the monitor state. A new snapshot replaces the old
+    one wholesale on publish, so readers never need the monitor lock.
+    """
+    version: int
+    devices: Mapping[str, Dict]
+    dashboard: Dict
+    published_at: float
+
+
+EMPTY_SNAPSHOT = MonitorSnapshot(0, MappingProxyType({}), {}, 0.0)
+
+class FleetAggregates:
+    """Running fleet-wide totals, updated as device statuses are replaced"""
+    
+    SUMMED_METRICS = ('cpu_usage', 'memory_usage', 'client_count')
+    
+    def __init__(self):
+        self.total_devices = 0
+        self.by_status = {}
+        self.by_type = {}
+        self.sums = {metric: 0 for metric in self.SUMMED_METRICS}
+    
+    def replace(self, old_status: Optional[Dict], new_status: Optional[Dict]):
+        """Swap one device's contribution: old_status out, new_status in"""
+        if old_status:
+            self._apply(old_status, -1)
+        if new_status:
+            self._apply(new_status, 1)
+    
+    def average(self, metric: str) -> float:
+        """Fleet average of a summed metric"""
+        if not self.total_devices:
+            return 0
+        return self.sums[metric] / self.total_devices
+    
+    def _apply(self, status: Dict, sign: int):
+        metrics = status.get('metrics', {})
+        self.total_devices += sign
+        self._count(self.by_status, metrics.get('status', 'unknown'), sign)
+        self._count(self.by_type, DEVICE_TYPE_LABELS.get(status.get('device_type'), 'Other'), sign)
+        for metric in self.SUMMED_METRICS:
+            value = metrics.get(metric, 0)
+            if isinstance(value, (int, float)):
+                self.sums[metric] += sign * value
+    
+    @staticmethod
+    def _count(counts: Dict[str, int], key: str, sign: int):
+        counts[key] = counts.get(key, 0) + sign
+        if not counts[key]:
+            del counts[key]
 
 class NetworkMonitor:
     """Network monitoring service"""
     
-    def __init__(self):
+    def __init__(self, config_file='../config/devices.json', device_manager=None):
+        self.config_file = config_file
+        self.device_manager = device_manager
+        self.config = self._load_monitoring_config()
+        self.metrics_store = None
+        self.alert_store = None
         self.monitoring_thread = None
         self.running = False
         self.devices_status = {}
-        self.alerts = deque(maxlen=100)  # Keep last 100 alerts
         self.metrics_history = {}
-        self.alert_rules = self._load_alert_rules()
+        self.fleet = FleetAggregates()
+        self.alert_engine = AlertEngine(build_alert_rules(self.config))
+        self.pending_samples = []
+        self.pending_alert_rows = {}
+        self.flush_lock = threading.Lock()
+        self.snapshot = EMPTY_SNAPSHOT
+        self.dirty = True
+        self.changed_devices = set()
+        self.changed_alerts = {}
+        self.subscribers = set()
+        self.monitored = set()
+        self.scheduler = PollScheduler(
+            self._poll_device,
+            default_interval=self.config.get('collection_interval', 30),
+            type_intervals=self.config.get('poll_intervals', {}),
+            max_workers=self.config.get('max_workers', 16),
+            max_backoff=self.config.get('max_backoff', 600)
+        )
         self.lock = threading.Lock()
+        self._publish_snapshot()
         
     def start(self):
         """Start the monitoring service"""
         if not self.running:
             self.running = True
+            self.metrics_store = self._open_metrics_store()
+            self._open_alert_store()
+            self.dirty = True
+            self._publish_snapshot()
             self.monitoring_thread = threading.Thread(target=self._monitoring_loop)
             self.monitoring_thread.daemon = True
             self.monitoring_thread.start()
             
+            # Each device is polled on its own schedule
+            self._refresh_devices()
+            self.scheduler.start()
+            
             # Schedule periodic tasks
-            schedule.every(30).seconds.do(self._collect_metrics)
+            schedule.every(1).minute.do(self._refresh_devices)
+            schedule.every(10).seconds.do(self._flush_samples)
+            schedule.every(1).seconds.do(self._publish_snapshot)
             schedule.every(1).minute.do(self._check_alerts)
             schedule.every(5).minutes.do(self._cleanup_old_data)
             
@@ -50,8 +157,22 @@ class NetworkMonitor:
     def stop(self):
         """Stop the monitoring service"""
         self.running = False
+        self.scheduler.stop()
+        with self.lock:
+            # End live-update streams
+            for subscriber in self.subscribers:
+                subscriber.put(None)
+            self.subscribers.clear()
         if self.monitoring_thread:
             self.monitoring_thread.join(timeout=5)
+        self._flush_samples()
+        self._persist_alerts()
+        if self.metrics_store:
+            self.metrics_store.close()
+            self.metrics_store = None
+        if self.alert_store:
+            self.alert_store.close()
+            self.alert_store = None
         logging.info("Network monitoring service stopped")
     
     def _monitoring_loop(self):
@@ -64,191 +185,361 @@ class NetworkMonitor:
                 logging.error(f"Error in monitoring loop: {e}")
                 time.sleep(5)
     
-    def _load_alert_rules(self) -> Dict:
-        """Load alert rules configuration"""
-        return {
-            'device_offline': {
-                'enabled': True,
-                'severity': 'critical',
-                'description': 'Device is offline or unreachable'
-            },
-            'high_cpu_usage': {
-                'enabled': True,
-                'threshold': 80,
-                'severity': 'warning',
-                'description': 'CPU usage is above threshold'
-            },
-            'high_memory_usage': {
-                'enabled': True,
-                'threshold': 85,
-                'severity': 'warning',
-                'description': 'Memory usage is above threshold'
-            },
-            'port_down': {
-                'enabled': True,
-                'severity': 'warning',
-                'description': 'Network port is down'
-            },
-            'high_temperature': {
-                'enabled': True,
-                'threshold': 60,
-                'severity': 'warning',
-                'description': 'Device temperature is above threshold'
-            },
-            'low_client_count': {
-                'enabled': True,
-                'threshold': 0,
-                'severity': 'info',
-                'description': 'No wireless clients connected to AP'
-            }
-        }
+    def _load_monitoring_config(self) -> Dict:
+        """Load the 'monitoring' section of the device configuration"""
+        try:
+            if os.path.exists(self.config_file):
+                with open(self.config_file, 'r') as f:
+                    return json.load(f).get('monitoring', {})
+        except Exception as e:
+            logging.error(f"Error loading monitoring config: {e}")
+        return {}
     
-    def _collect_metrics(self):
-        """Collect metrics from all devices"""
+    def _get_data_directory(self) -> str:
+        """monitoring.data_directory, relative paths resolved from the project root"""
+        directory = self.config.get('data_directory', './data')
+        if not os.path.isabs(directory):
+            project_root = os.path.join(os.path.dirname(os.path.abspath(self.config_file)), '..')
+            directory = os.path.normpath(os.path.join(project_root, directory))
+        return directory
+    
+    def _open_metrics_store(self) -> Optional[MetricsStore]:
+        """Open the time-series store in monitoring.data_directory"""
+        try:
+            return MetricsStore(os.path.join(self._get_data_directory(), 'metrics.db'),
+                                retention_days=self.config.get('retention_days', 30),
+                                raw_retention_days=self.config.get('raw_retention_days', 7))
+        except Exception as e:
+            logging.error(f"Error opening metrics store: {e}")
+            return None
+    
+    def _open_alert_store(self):
+        """Open the alert history and resume incidents still firing from a previous run"""
         try:
-            # This would typically interface with DeviceManager
-            # For now, we'll simulate data collection
+            self.alert_store = AlertStore(os.path.join(self._get_data_directory(), 'alerts.db'))
+        except Exception as e:
+            logging.error(f"Error opening alert store: {e}")
+            return
             
+        with self.lock:
+            for alert in self.alert_store.open_alerts.values():
+                started = datetime.fromisoformat(alert['started_at']).timestamp()
+                self.alert_engine.restore(alert, started)
+    
+    def _refresh_devices(self) -> List[Dict]:
+        """
+        Hand the current device list to the poll scheduler, and drop the
+        status and incidents of devices removed or disabled in the config
+        """
+        try:
             devices = self._get_devices_list()
+            self.scheduler.sync(devices)
             
             with self.lock:
-                current_time = datetime.now()
-                
-                for device in devices:
-                    device_id = device['id']
-                    
-                    # Initialize metrics history for new devices
-                    if device_id not in self.metrics_history:
-                        self.metrics_history[device_id] = {
-                            'cpu_usage': deque(maxlen=60),  # Last 60 measurements
-                            'memory_usage': deque(maxlen=60),
-                            'temperature': deque(maxlen=60),
-                            'client_count': deque(maxlen=60),
-                            'timestamps': deque(maxlen=60)
-                        }
-                    
-                    # Collect current metrics (simulated)
-                    metrics = self._get_device_metrics(device_id)
-                    
-                    # Store metrics
-                    history = self.metrics_history[device_id]
-                    history['cpu_usage'].append(metrics.get('cpu_usage', 0))
-                    history['memory_usage'].append(metrics.get('memory_usage', 0))
-                    history['temperature'].append(metrics.get('temperature', 0))
-                    history['client_count'].append(metrics.get('client_count', 0))
-                    history['timestamps'].append(current_time.isoformat())
-                    
-                    # Update device status
-                    self.devices_status[device_id] = {
-                        'last_seen': current_time.isoformat(),
-                        'status': metrics.get('status', 'unknown'),
-                        'metrics': metrics
-                    }
+                self.monitored = {device['id'] for device in devices}
+                known = set(self.devices_status)
+                known.update(device_id for device_id, _ in self.alert_engine.incidents)
+                for device_id in known - self.monitored:
+                    self._forget_device(device_id)
+            self._persist_alerts()
+            return devices
+        except Exception as e:
+            logging.error(f"Error refreshing monitored devices: {e}")
+            return []
+    
+    def _collect_metrics(self):
+        """Poll every device once, right now, and store the results"""
+        try:
+            devices = self._refresh_devices()
+            if devices:
+                with ThreadPoolExecutor(max_workers=self.scheduler.max_workers,
+                                        thread_name_prefix='monitor-collect') as executor:
+                    list(executor.map(self._poll_device, devices))
+            self._flush_samples()
+            self._publish_snapshot()
                     
         except Exception as e:
             logging.error(f"Error collecting metrics: {e}")
     
-    def _get_devices_list(self) -> List[Dict]:
-        """Get list of devices to monitor (simulated)"""
-        # This would typically come from DeviceManager
-        return [
-            {'id': 'aruba_ap_1', 'type': 'aruba_ap500'},
-            {'id': 'aruba_ap_2', 'type': 'aruba_ap500'},
-            {'id': '3com_switch_1', 'type': '3com_switch'}
+    def _poll_device(self, device: Dict) -> bool:
+        """Collect and record one device's metrics; True if it answered"""
+        # Network I/O, without holding the monitor lock
+        metrics = self._get_device_metrics(device['id'])
+        self._record_metrics(device, metrics)
+        self._persist_alerts()
+        return metrics.get('status') == 'online'
+    
+    def _record_metrics(self, device: Dict, metrics: Dict):
+        """Publish a device's fresh metrics to history, alerts and status"""
+        device_id = device['id']
+        current_time = datetime.now()
+        timestamp = int(current_time.timestamp())
+        
+        # Everything that does not touch shared state is prepared unlocked
+        samples = [(device_id, metric, timestamp, value) for metric, value in metrics.items()
+                   if isinstance(value, (int, float)) and not isinstance(value, bool)]
+        status = {
+            'device_type': device.get('type'),
+            'last_seen': current_time.isoformat(),
+            'status': metrics.get('status', 'unknown'),
+            'metrics': metrics
+        }
+        
+        with self.lock:
+            if device_id not in self.monitored:
+                # Removed or disabled while it was being polled
+                return
+                
+            # Initialize metrics history for new devices
+            if device_id not in self.metrics_history:
+                self.metrics_history[device_id] = MetricRingBuffer(HISTORY_METRICS, HISTORY_LENGTH)
+            history = self.metrics_history[device_id]
+            history.append(timestamp, metrics)
+            status['history'] = self._summarize_history(history)
+            
+            # Queue samples for the time-series store
+            self.pending_samples.extend(samples)
+            
+            # Evaluate alert rules against the metrics that changed
+            previous = self.devices_status.get(device_id, {}).get('metrics', {})
+            changed = {metric: value for metric, value in metrics.items()
+                       if metric not in previous or previous[metric] != value}
+            self._apply_alert_events(
+                self.alert_engine.evaluate(device_id, changed, current_time.timestamp()))
+            
+            # Update device status and its share of the fleet totals
+            self.fleet.replace(self.devices_status.get(device_id), status)
+            self.devices_status[device_id] = status
+            self.changed_devices.add(device_id)
+            self.dirty = True
+    
+    def _summarize_history(self, history: MetricRingBuffer) -> Dict:
+        """Last 10 points and window averages of a device's history"""
+        summary = {
+            metric: history.window(metric, 10).tolist()
+            for metric in ('cpu_usage', 'memory_usage', 'temperature')
+        }
+        summary['timestamps'] = [
+            datetime.fromtimestamp(ts).isoformat()
+            for ts in history.timestamp_window(10).tolist()
         ]
+        summary['averages'] = {
+            metric: round(history.aggregate(metric)['mean'], 1)
+            for metric in HISTORY_METRICS
+        }
+        return summary
     
-    def _get_device_metrics(self, device_id: str) -> Dict:
-        """Get current metrics for a device (simulated)"""
-        import random
+    def _publish_snapshot(self):
+        """
+        Publish a new snapshot if anything changed since the last one, and
+        push the changes to live-update subscribers as a delta.
         
-        # Simulate different metrics based on device type
-        if 'aruba_ap' in device_id:
-            return {
-                'status': 'online',
-                'cpu_usage': random.randint(10, 40),
-                'memory_usage': random.randint(30, 60),
-                'temperature': random.randint(35, 50),
-                'client_count': random.randint(5, 25),
-                'signal_strength': random.randint(-70, -30)
-            }
-        elif '3com_switch' in device_id:
-            return {
-                'status': 'online',
-                'cpu_usage': random.randint(5, 25),
-                'memory_usage': random.randint(20, 45),
-                'temperature': random.randint(30, 45),
-                'port_count': 24,
-                'ports_up': random.randint(15, 24)
+        Status records are never mutated once stored, so the snapshot
+        shares them and only the device index is copied.
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+            devices = MappingProxyType(dict(self.devices_status))
+            dashboard = self._build_dashboard()
+            self.snapshot = MonitorSnapshot(self.snapshot.version + 1, devices, dashboard,
+                                            time.time())
+            
+            delta = {
+                'version': self.snapshot.version,
+                'devices': {
+                    device_id: {key: value for key, value in devices[device_id].items()
+                                if key != 'history'}
+                    for device_id in self.changed_devices if device_id in devices
+                },
+                'removed_devices': [device_id for device_id in self.changed_devices
+                                    if device_id not in devices],
+                'alerts': [alert.copy() for alert in self.changed_alerts.values()],
+                'summary': dashboard['summary'],
+                'metrics': dashboard['metrics'],
+                'device_types': dashboard['device_types'],
+                'last_updated': dashboard['last_updated']
             }
+            self.changed_devices = set()
+            self.changed_alerts = {}
+            
+            # Non-blocking, and under the lock so deltas stay in version order
+            for subscriber in list(self.subscribers):
+                if subscriber.qsize() >= SUBSCRIBER_BACKLOG:
+                    # Too far behind: end its stream so the client reloads
+                    self.subscribers.discard(subscriber)
+                    subscriber.put(None)
+                else:
+                    subscriber.put(delta)
+    
+    def subscribe(self) -> queue.Queue:
+        """Register for the delta published with every new snapshot"""
+        subscriber = queue.Queue()
+        with self.lock:
+            self.subscribers.add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+    
+    def stream_updates(self, keepalive: float = 15) -> Iterable[Optional[Dict]]:
+        """
+        Subscribe now and return an iterator over each published delta.
+        It yields None after keepalive seconds without a delta, and ends
+        if the consumer falls too far behind or the monitor stops.
+        """
+        return self._iter_updates(self.subscribe(), keepalive)
+    
+    def _iter_updates(self, subscriber: queue.Queue, keepalive: float):
+        try:
+            while True:
+                try:
+                    delta = subscriber.get(timeout=keepalive)
+                except queue.Empty:
+                    yield None
+                    continue
+                if delta is None:
+                    return
+                yield delta
+        finally:
+            self.unsubscribe(subscriber)
+    
+    def _flush_samples(self):
+        """Write queued samples to the time-series store in one batch"""
+        with self.lock:
+            samples, self.pending_samples = self.pending_samples, []
+            
+        if samples and self.metrics_store:
+            try:
+                self.metrics_store.write_batch(samples)
+            except Exception as e:
+                logging.error(f"Error writing metrics: {e}")
+    
+    def _persist_alerts(self):
+        """
+        Write staged alert rows to the alert store outside the monitor lock.
+        flush_lock keeps flushes in order, so an older snapshot of an alert
+        never overwrites a newer one.
+        """
+        with self.flush_lock:
+            with self.lock:
+                rows, self.pending_alert_rows = self.pending_alert_rows, {}
+                
+            if rows and self.alert_store:
+                try:
+                    self.alert_store.write(rows.values())
+                except Exception as e:
+                    logging.error(f"Error writing alerts: {e}")
+    
+    def _get_devices_list(self) -> List[Dict]:
+        """Get the enabled devices of the DeviceManager to monitor"""
+        if not self.device_manager:
+            return []
+            
+        devices = []
+        for device_id, device_config in list(self.device_manager.devices.items()):
+            if not device_config.get('enabled', True):
+                continue
+            device = {'id': device_id, 'type': device_config.get('type')}
+            if device_config.get('poll_interval'):
+                device['poll_interval'] = device_config['poll_interval']
+            devices.append(device)
+        return devices
+    
+    def _get_device_metrics(self, device_id: str) -> Dict:
+        """
+        Poll a device through its DeviceManager manager and flatten the
+        status into metrics. A device that does not answer within
+        monitoring.poll_timeout seconds reports status 'timeout'.
+        """
+        status = self.device_manager.poll_device(device_id, self.config.get('poll_timeout'))
+        metrics = {'status': status.get('status', 'unknown')}
         
-        return {'status': 'unknown'}
+        if metrics['status'] != 'online':
+            if status.get('error'):
+                metrics['error'] = status['error']
+            return metrics
+            
+        for metric in ('cpu_usage', 'memory_usage', 'temperature'):
+            if metric in status:
+                metrics[metric] = status[metric]
+                
+        # Aruba APs; a count the AP did not report is left out, not 0
+        if status.get('clients_connected') is not None:
+            metrics['client_count'] = status['clients_connected']
+            
+        # 3Com switches
+        ports = status.get('ports')
+        if ports:
+            ports_up = sum(1 for port in ports.values() if port.get('status') == 'up')
+            metrics['port_count'] = len(ports)
+            metrics['ports_up'] = ports_up
+            metrics['ports_down'] = len(ports) - ports_up
+            
+        return metrics
     
     def _check_alerts(self):
-        """Check for alert conditions and generate alerts"""
+        """Fire pending alerts whose condition has lasted the rule's duration"""
         try:
             with self.lock:
-                for device_id, status in self.devices_status.items():
-                    metrics = status.get('metrics', {})
-                    
-                    # Check each alert rule
-                    for rule_name, rule_config in self.alert_rules.items():
-                        if not rule_config.get('enabled', False):
-                            continue
-                            
-                        alert = None
-                        
-                        # Device offline check
-                        if rule_name == 'device_offline':
-                            last_seen = datetime.fromisoformat(status['last_seen'])
-                            if datetime.now() - last_seen > timedelta(minutes=2):
-                                alert = self._create_alert(
-                                    device_id, rule_name, rule_config,
-                                    f"Device {device_id} has been offline for more than 2 minutes"
-                                )
-                        
-                        # High CPU usage
-                        elif rule_name == 'high_cpu_usage':
-                            cpu_usage = metrics.get('cpu_usage', 0)
-                            if cpu_usage > rule_config.get('threshold', 80):
-                                alert = self._create_alert(
-                                    device_id, rule_name, rule_config,
-                                    f"CPU usage is {cpu_usage}% (threshold: {rule_config['threshold']}%)"
-                                )
-                        
-                        # High memory usage
-                        elif rule_name == 'high_memory_usage':
-                            memory_usage = metrics.get('memory_usage', 0)
-                            if memory_usage > rule_config.get('threshold', 85):
-                                alert = self._create_alert(
-                                    device_id, rule_name, rule_config,
-                                    f"Memory usage is {memory_usage}% (threshold: {rule_config['threshold']}%)"
-                                )
-                        
-                        # High temperature
-                        elif rule_name == 'high_temperature':
-                            temperature = metrics.get('temperature', 0)
-                            if temperature > rule_config.get('threshold', 60):
-                                alert = self._create_alert(
-                                    device_id, rule_name, rule_config,
-                                    f"Temperature is {temperature}°C (threshold: {rule_config['threshold']}°C)"
-                                )
-                        
-                        if alert:
-                            self.alerts.appendleft(alert)
-                            logging.warning(f"Alert generated: {alert['message']}")
+                self._apply_alert_events(self.alert_engine.advance(time.time()))
+            self._persist_alerts()
                             
         except Exception as e:
             logging.error(f"Error checking alerts: {e}")
     
-    def _create_alert(self, device_id: str, rule_name: str, rule_config: Dict, message: str) -> Dict:
-        """Create an alert"""
+    def _apply_alert_events(self, events: Iterable):
+        """
+        Create, update or resolve alert records for incident transitions and
+        stage them for _persist_alerts (lock held)
+        """
+        changed = []
+        for event, incident in events:
+            if event == 'firing':
+                incident.alert = self._create_alert(incident)
+                changed.append(incident.alert)
+                logging.warning(f"Alert generated: {incident.alert['message']}")
+                continue
+                
+            alert = incident.alert
+            if alert is None:
+                continue
+            alert['value'] = incident.value
+            alert['message'] = incident.rule.format_message(incident.device_id, incident.value)
+            alert['updated_at'] = datetime.now().isoformat()
+            if event == 'resolved':
+                alert['state'] = 'resolved'
+                alert['resolved'] = True
+                alert['resolved_at'] = alert['updated_at']
+                logging.info(f"Alert resolved: {alert['id']}")
+            changed.append(alert)
+            
+        self._stage_alerts(changed)
+    
+    def _stage_alerts(self, alerts: List[Dict]):
+        """Index changed alerts and queue their rows for writing (lock held)"""
+        for alert in alerts:
+            self.changed_alerts[alert['id']] = alert
+            self.dirty = True
+        if alerts and self.alert_store:
+            for row in self.alert_store.stage(alerts):
+                self.pending_alert_rows[row[0]] = row
+    
+    def _create_alert(self, incident: Incident) -> Dict:
+        """Create the alert record of a newly firing incident"""
+        rule = incident.rule
         return {
-            'id': f"{device_id}_{rule_name}_{int(time.time())}",
-            'device_id': device_id,
-            'rule_name': rule_name,
-            'severity': rule_config.get('severity', 'info'),
-            'message': message,
-            'description': rule_config.get('description', ''),
+            'id': f"{incident.device_id}_{rule.name}_{int(incident.started)}",
+            'device_id': incident.device_id,
+            'rule_name': rule.name,
+            'severity': rule.severity,
+            'state': 'firing',
+            'value': incident.value,
+            'message': rule.format_message(incident.device_id, incident.value),
+            'description': rule.description,
+            'started_at': datetime.fromtimestamp(incident.started).isoformat(),
             'timestamp': datetime.now().isoformat(),
             'acknowledged': False,
             'resolved': False
@@ -268,112 +559,147 @@ class NetworkMonitor:
                         devices_to_remove.append(device_id)
                 
                 for device_id in devices_to_remove:
-                    del self.devices_status[device_id]
-                    if device_id in self.metrics_history:
-                        del self.metrics_history[device_id]
+                    self._forget_device(device_id)
                 
+            self._persist_alerts()
             logging.info(f"Cleaned up data for {len(devices_to_remove)} inactive devices")
             
+            # Resolved alerts follow the same retention as metrics
+            if self.alert_store:
+                self.alert_store.prune(time.time() - self.config.get('retention_days', 30) * 86400)
+            
+            # Enforce monitoring.retention_days on stored history
+            if self.metrics_store:
+                self.metrics_store.drop_expired()
+            
         except Exception as e:
             logging.error(f"Error cleaning up old data: {e}")
     
+    def _forget_device(self, device_id: str):
+        """
+        Drop a device's status, history and open incidents; the next delta
+        lists it in removed_devices (lock held)
+        """
+        self.changed_devices.add(device_id)
+        self.dirty = True
+        self.fleet.replace(self.devices_status.pop(device_id, None), None)
+        self._apply_alert_events(
+            ('resolved', incident) for incident in self.alert_engine.forget_device(device_id)
+            if incident.state == 'firing')
+        self.metrics_history.pop(device_id, None)
+    
     def get_device_status(self, device_id: str) -> Dict:
-        """Get current status for a specific device"""
-        with self.lock:
-            if device_id in self.devices_status:
-                status = self.devices_status[device_id].copy()
-                
-                # Add metrics history
-                if device_id in self.metrics_history:
-                    history = self.metrics_history[device_id]
-                    status['history'] = {
-                        'cpu_usage': list(history['cpu_usage'])[-10:],  # Last 10 points
-                        'memory_usage': list(history['memory_usage'])[-10:],
-                        'temperature': list(history['temperature'])[-10:],
-                        'timestamps': list(history['timestamps'])[-10:]
-                    }
-                
-                return status
+        """Get current status for a specific device, from the latest snapshot"""
+        status = self.snapshot.devices.get(device_id)
+        if status is not None:
+            return status.copy()
             
         return {'status': 'unknown', 'message': 'Device not found'}
     
-    def get_dashboard_data(self) -> Dict:
-        """Get aggregated dashboard data"""
-        with self.lock:
-            total_devices = len(self.devices_status)
-            online_devices = sum(1 for status in self.devices_status.values() 
-                               if status.get('metrics', {}).get('status') == 'online')
-            offline_devices = total_devices - online_devices
-            
-            # Get recent alerts
-            recent_alerts = [alert for alert in list(self.alerts)[:10]]
-            
-            # Calculate average metrics
-            avg_cpu = 0
-            avg_memory = 0
-            total_clients = 0
-            
-            if self.devices_status:
-                cpu_values = [status.get('metrics', {}).get('cpu_usage', 0) 
-                             for status in self.devices_status.values()]
-                memory_values = [status.get('metrics', {}).get('memory_usage', 0) 
-                               for status in self.devices_status.values()]
-                client_values = [status.get('metrics', {}).get('client_count', 0) 
-                               for status in self.devices_status.values()]
-                
-                avg_cpu = sum(cpu_values) / len(cpu_values) if cpu_values else 0
-                avg_memory = sum(memory_values) / len(memory_values) if memory_values else 0
-                total_clients = sum(client_values)
+    def get_metric_history(self, device_id: str, metric: str, start: Optional[int] = None,
+                           end: Optional[int] = None, max_points: int = 300) -> Dict:
+        """
+        Get stored history of a metric between two epoch timestamps
+        
+        The coarsest rollup tier (raw, 1m, 5m or 1h) that still gives about
+        max_points points over the window is used.
+        """
+        if not self.metrics_store:
+            return {'resolution': 0, 'points': []}
             
-            # Device breakdown by type
-            device_types = {}
-            for device_id in self.devices_status.keys():
-                if 'aruba_ap' in device_id:
-                    device_types['Aruba AP'] = device_types.get('Aruba AP', 0) + 1
-                elif '3com_switch' in device_id:
-                    device_types['3Com Switch'] = device_types.get('3Com Switch', 0) + 1
-                else:
-                    device_types['Other'] = device_types.get('Other', 0) + 1
+        result = self.metrics_store.query_range(device_id, metric, start, end, max_points)
+        return {
+            'resolution': result['resolution'],
+            'points': [
+                {
+                    'timestamp': datetime.fromtimestamp(ts).isoformat(),
+                    'value': round(avg, 2),
+                    'min': low,
+                    'max': high,
+                    'last': last
+                }
+                for ts, avg, low, high, last in result['points']
+            ]
+        }
+    
+    def get_dashboard_data(self) -> Dict:
+        """Get aggregated dashboard data, from the latest snapshot"""
+        return self.snapshot.dashboard
+    
+    def get_snapshot(self) -> MonitorSnapshot:
+        """Current published snapshot"""
+        return self.snapshot
+    
+    def _build_dashboard(self) -> Dict:
+        """Dashboard data from the running fleet aggregates (lock held)"""
+        fleet = self.fleet
+        online_devices = fleet.by_status.get('online', 0)
+        alert_store = self.alert_store
+        
+        return {
+            'summary': {
+                'total_devices': fleet.total_devices,
+                'online_devices': online_devices,
+                'offline_devices': fleet.total_devices - online_devices,
+                'devices_by_status': dict(fleet.by_status),
+                'total_alerts': alert_store.total if alert_store else 0,
+                'unresolved_alerts': len(alert_store.open_alerts) if alert_store else 0
+            },
+            'metrics': {
+                'average_cpu_usage': round(fleet.average('cpu_usage'), 1),
+                'average_memory_usage': round(fleet.average('memory_usage'), 1),
+                'total_wireless_clients': fleet.sums['client_count']
+            },
+            'device_types': dict(fleet.by_type),
+            # Copies, since live alert records keep changing
+            'recent_alerts': [alert.copy() for alert in alert_store.get_recent()] if alert_store else [],
+            'last_updated': datetime.now().isoformat()
+        }
+    
+    def get_alerts(self, device_id: Optional[str] = None, severity: Optional[str] = None,
+                   state: Optional[str] = None, acknowledged: Optional[bool] = None,
+                   since: Optional[float] = None, limit: int = 100, offset: int = 0) -> Dict:
+        """Get alerts matching the given filters, newest first, one page at a time"""
+        if not self.alert_store:
+            return {'alerts': [], 'total': 0}
             
-            return {
-                'summary': {
-                    'total_devices': total_devices,
-                    'online_devices': online_devices,
-                    'offline_devices': offline_devices,
-                    'total_alerts': len(self.alerts),
-                    'unresolved_alerts': sum(1 for alert in self.alerts if not alert.get('resolved', False))
-                },
-                'metrics': {
-                    'average_cpu_usage': round(avg_cpu, 1),
-                    'average_memory_usage': round(avg_memory, 1),
-                    'total_wireless_clients': total_clients
-                },
-                'device_types': device_types,
-                'recent_alerts': recent_alerts,
-                'last_updated': datetime.now().isoformat()
-            }
+        alerts, total = self.alert_store.query(device_id, severity, state, acknowledged,
+                                               since, limit, offset)
+        return {'alerts': alerts, 'total': total}
     
-    def get_alerts(self) -> List[Dict]:
-        """Get all alerts"""
-        with self.lock:
-            return list(self.alerts)
+    def get_alerts_version(self) -> int:
+        """Version of the stored alert history, bumped on every write"""
+        return self.alert_store.version if self.alert_store else 0
     
     def acknowledge_alert(self, alert_id: str) -> bool:
         """Acknowledge an alert"""
+        alert = self.alert_store.get(alert_id) if self.alert_store else None
+        if alert is None:
+            return False
+            
         with self.lock:
-            for alert in self.alerts:
-                if alert['id'] == alert_id:
-                    alert['acknowledged'] = True
-                    alert['acknowledged_at'] = datetime.now().isoformat()
-                    return True
-        return False
+            alert['acknowledged'] = True
+            alert['acknowledged_at'] = datetime.now().isoformat()
+            self._stage_alerts([alert])
+        self._persist_alerts()
+        self._publish_snapshot()
+        return True
     
     def resolve_alert(self, alert_id: str) -> bool:
-        """Resolve an alert"""
+        """Resolve an alert and close its incident"""
+        alert = self.alert_store.get(alert_id) if self.alert_store else None
+        if alert is None:
+            return False
+            
         with self.lock:
-            for alert in self.alerts:
-                if alert['id'] == alert_id:
-                    alert['resolved'] = True
-                    alert['resolved_at'] = datetime.now().isoformat()
-                    return True
-        return False
\ No newline at end of file
+            alert['state'] = 'resolved'
+            alert['resolved'] = True
+            alert['resolved_at'] = datetime.now().isoformat()
+            self._stage_alerts([alert])
+            
+            incident = self.alert_engine.incidents.get((alert['device_id'], alert['rule_name']))
+            if incident is not None and incident.alert is alert:
+                self.alert_engine.close(alert['device_id'], alert['rule_name'])
+        self._persist_alerts()
+        self._publish_snapshot()
+        return True
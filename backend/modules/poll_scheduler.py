@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Poll Scheduler Module
+
+Per-device polling for the network monitor:
+- A heap of next-due times instead of one fleet-wide sweep
+- Jittered first polls and intervals so load spreads evenly over time
+- Intervals per device ('poll_interval') or per device type
+- Exponential backoff for devices that do not answer
+- A bounded worker pool, with at most one poll in flight per device
+"""
+
+import time
+import heapq
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+class PollScheduler:
+    """Runs poll(device) for every device on its own schedule"""
+
+    def __init__(self, poll: Callable[[Dict], bool], default_interval: float = 30,
+                 type_intervals: Optional[Dict[str, float]] = None, max_workers: int = 16,
+                 jitter: float = 0.1, max_backoff: float = 600):
+        self.poll = poll
+        self.default_interval = default_interval
+        self.type_intervals = type_intervals or {}
+        self.max_workers = max(1, int(max_workers))
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+
+        # Heap of (due, seq, device_id); entries whose seq no longer matches
+        # the device's schedule are stale and skipped
+        self.heap: List = []
+        self.schedules: Dict[str, Dict] = {}
+        self.seq = 0
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.executor = None
+
+    def start(self):
+        """Start dispatching polls in a background thread"""
+        with self.condition:
+            if self.running:
+                return
+            self.running = True
+
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                           thread_name_prefix='monitor-poll')
+        self.thread = threading.Thread(target=self._run, name='poll-scheduler')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Stop dispatching; polls already running are not waited for"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout=5)
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    def sync(self, devices: List[Dict]):
+        """
+        Make the schedule match a device list. New devices get a random
+        first poll within their interval; removed devices are dropped.
+        """
+        now = time.time()
+        with self.condition:
+            current = {device['id']: device for device in devices}
+
+            for device_id in list(self.schedules):
+                if device_id not in current:
+                    del self.schedules[device_id]
+
+            for device_id, device in current.items():
+                schedule = self.schedules.get(device_id)
+                if schedule is not None:
+                    schedule['device'] = device
+                    continue
+
+                self.schedules[device_id] = {'device': device, 'failures': 0}
+                self._push(device_id, now + random.uniform(0, self.interval_for(device)))
+
+            self.condition.notify_all()
+
+    def interval_for(self, device: Dict) -> float:
+        """Poll interval of a device: its own setting, then its type's, then the default"""
+        return (device.get('poll_interval')
+                or self.type_intervals.get(device.get('type'))
+                or self.default_interval)
+
+    def _run(self):
+        """Dispatch due polls to the worker pool"""
+        while True:
+            with self.condition:
+                while self.running and not self._next_due_now():
+                    timeout = self.heap[0][0] - time.time() if self.heap else None
+                    self.condition.wait(timeout)
+                if not self.running:
+                    return
+
+                _, seq, device_id = heapq.heappop(self.heap)
+                schedule = self.schedules.get(device_id)
+                if schedule is None or schedule['seq'] != seq:
+                    continue
+
+            try:
+                self.executor.submit(self._poll_one, device_id, schedule)
+            except RuntimeError:
+                # Executor shut down by stop()
+                return
+
+    def _next_due_now(self) -> bool:
+        return bool(self.heap) and self.heap[0][0] <= time.time()
+
+    def _poll_one(self, device_id: str, schedule: Dict):
+        """Poll one device and schedule its next poll"""
+        try:
+            reachable = self.poll(schedule['device'])
+        except Exception as e:
+            logging.error(f"Error polling {device_id}: {e}")
+            reachable = False
+
+        with self.condition:
+            if self.schedules.get(device_id) is not schedule:
+                # Removed (or removed and re-added) while polling
+                return
+
+            schedule['failures'] = 0 if reachable else schedule['failures'] + 1
+            delay = self.interval_for(schedule['device'])
+            if schedule['failures']:
+                backoff = 2 ** min(schedule['failures'], 16)
+                delay = min(delay * backoff, max(self.max_backoff, delay))
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+
+            self._push(device_id, time.time() + delay)
+            self.condition.notify_all()
+
+    def _push(self, device_id: str, due: float):
+        """Schedule a device's next poll (condition held)"""
+        self.seq += 1
+        schedule = self.schedules[device_id]
+        schedule['seq'] = self.seq
+        heapq.heappush(self.heap, (due, self.seq, device_id))
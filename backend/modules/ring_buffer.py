@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Ring Buffer Module
+
+Compact per-device metric history for the monitor:
+- Preallocated NumPy arrays, float32 values and int64 epoch timestamps
+- O(1) append with no per-sample Python objects
+- Zero-copy views of the most recent window
+- Vectorized aggregates over a window
+"""
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+
+class MetricRingBuffer:
+    """
+    Fixed-capacity columnar ring buffer of metric samples.
+
+    Every sample is written twice, at pos and pos + capacity, so the last
+    n samples are always one contiguous slice and windows never need to
+    be copied or re-ordered.
+    """
+
+    def __init__(self, metrics: Sequence[str], capacity: int = 60):
+        self.metrics = list(metrics)
+        self.columns = {metric: i for i, metric in enumerate(self.metrics)}
+        self.capacity = capacity
+        self.timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self.values = np.zeros((len(self.metrics), 2 * capacity), dtype=np.float32)
+        self.position = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, timestamp: int, values: Dict[str, float]):
+        """Add one sample; metrics missing from values are stored as 0"""
+        row = np.fromiter((values.get(metric, 0) for metric in self.metrics),
+                          dtype=np.float32, count=len(self.metrics))
+        for pos in (self.position, self.position + self.capacity):
+            self.timestamps[pos] = timestamp
+            self.values[:, pos] = row
+
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def window(self, metric: str, count: Optional[int] = None) -> np.ndarray:
+        """Read-only view of the last count values of a metric, oldest first"""
+        view = self.values[self.columns[metric], self._window_slice(count)]
+        view.flags.writeable = False
+        return view
+
+    def timestamp_window(self, count: Optional[int] = None) -> np.ndarray:
+        """Read-only view of the last count timestamps, oldest first"""
+        view = self.timestamps[self._window_slice(count)]
+        view.flags.writeable = False
+        return view
+
+    def aggregate(self, metric: str, count: Optional[int] = None) -> Dict[str, float]:
+        """min/max/mean/last of a metric over the last count samples"""
+        values = self.window(metric, count)
+        if not values.size:
+            return {'min': 0.0, 'max': 0.0, 'mean': 0.0, 'last': 0.0}
+        return {
+            'min': float(values.min()),
+            'max': float(values.max()),
+            'mean': float(values.mean(dtype=np.float64)),
+            'last': float(values[-1])
+        }
+
+    def _window_slice(self, count: Optional[int]) -> slice:
+        """Contiguous slice covering the last count samples"""
+        count = self.size if count is None else max(0, min(count, self.size))
+        end = self.position + self.capacity
+        return slice(end - count, end)
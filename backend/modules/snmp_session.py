@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+SNMP Session Module
+
+Process-wide cache of SNMP engines and transport targets:
+- One session per (ip, community, version, timeout, retries), reused
+  across requests
+- Idle sessions are evicted and their sockets closed
+- Thread-safe for the discovery pool, the API threads and the monitor
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+try:
+    from pysnmp.hlapi import (
+        SnmpEngine, CommunityData, UdpTransportTarget, ContextData,
+        ObjectType, ObjectIdentity, getCmd, nextCmd, bulkCmd
+    )
+    from pysnmp.proto.rfc1905 import NoSuchObject, NoSuchInstance, EndOfMibView
+except ImportError as e:
+    logging.error(f"Required libraries not installed: {e}")
+    logging.info("Please run: pip install -r requirements.txt")
+
+# SNMP message processing model per community-based version
+MP_MODELS = {'1': 0, '2c': 1}
+
+# Per-request timeout (seconds) and retries when a caller sets neither;
+# an unanswered request costs timeout * (retries + 1)
+DEFAULT_TIMEOUT = 1
+DEFAULT_RETRIES = 2
+
+
+class SnmpError(Exception):
+    """The agent did not answer a request"""
+
+
+class SnmpSession:
+    """Cached SNMP engine and transport target for a single agent"""
+
+    def __init__(self, ip: str, community: str = 'public', version: str = '2c',
+                 port: int = 161, timeout: float = DEFAULT_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES):
+        self.ip = ip
+        self.community = community
+        self.version = version
+        self.engine = SnmpEngine()
+        self.auth = CommunityData(community, mpModel=MP_MODELS.get(version, 1))
+        self.target = UdpTransportTarget((ip, port), timeout=timeout, retries=retries)
+        self.context = ContextData()
+        # pysnmp engines are not safe for concurrent use, so requests
+        # to the same agent are serialized
+        self.lock = threading.RLock()
+        self.last_used = time.time()
+
+    def get(self, oids: Iterable[str]) -> Dict[str, Any]:
+        """
+        Fetch several scalar OIDs in a single GET PDU.
+
+        Returns {oid: value} for every OID the agent answered; OIDs the
+        agent does not implement are left out.
+        """
+        oids = list(oids)
+        values = {}
+
+        with self.lock:
+            self.last_used = time.time()
+            errorIndication, errorStatus, errorIndex, varBinds = next(getCmd(
+                self.engine,
+                self.auth,
+                self.target,
+                self.context,
+                *[ObjectType(ObjectIdentity(oid)) for oid in oids]))
+
+        if errorIndication or errorStatus:
+            logging.debug(f"SNMP error from {self.ip}: {errorIndication or errorStatus.prettyPrint()}")
+            return values
+
+        # Response varbinds come back in request order
+        for oid, (name, val) in zip(oids, varBinds):
+            if isinstance(val, (NoSuchObject, NoSuchInstance, EndOfMibView)):
+                continue
+            values[oid] = val
+
+        return values
+
+    def get_scalar(self, oid: str) -> Optional[Any]:
+        """
+        Fetch one scalar OID.
+
+        Returns None when the agent answered without a value (noSuchObject,
+        noSuchInstance or an SNMPv1 error status) and raises SnmpError when
+        it did not answer, so callers can tell a missing object from an
+        unreachable agent.
+        """
+        with self.lock:
+            self.last_used = time.time()
+            errorIndication, errorStatus, errorIndex, varBinds = next(getCmd(
+                self.engine,
+                self.auth,
+                self.target,
+                self.context,
+                ObjectType(ObjectIdentity(oid))))
+
+        if errorIndication:
+            raise SnmpError(f"SNMP error from {self.ip}: {errorIndication}")
+        if errorStatus:
+            return None
+
+        for name, val in varBinds:
+            if isinstance(val, (NoSuchObject, NoSuchInstance, EndOfMibView)):
+                return None
+            return val
+        return None
+
+    def walk_table(self, columns: Dict[str, str], max_repetitions: int = 25) -> Dict[str, Dict[str, Any]]:
+        """
+        Walk one or more table columns with GETBULK.
+
+        columns maps a result key to a column OID; columns from tables that
+        share an index (e.g. ifTable and ifXTable) can be walked together.
+        Returns {index: {key: value}} where index is the dotted OID suffix
+        after the column. SNMPv1 agents are walked with GETNEXT instead.
+        """
+        keys = list(columns)
+        prefixes = [tuple(int(part) for part in columns[key].split('.')) for key in keys]
+        objects = [ObjectType(ObjectIdentity(columns[key])) for key in keys]
+        rows = {}
+
+        with self.lock:
+            self.last_used = time.time()
+            if self.version == '1':
+                responses = nextCmd(
+                    self.engine, self.auth, self.target, self.context,
+                    *objects, lexicographicMode=False)
+            else:
+                responses = bulkCmd(
+                    self.engine, self.auth, self.target, self.context,
+                    0, max_repetitions,
+                    *objects, lexicographicMode=False)
+
+            for (errorIndication, errorStatus, errorIndex, varBinds) in responses:
+                if errorIndication or errorStatus:
+                    logging.debug(f"SNMP error walking table on {self.ip}: {errorIndication or errorStatus.prettyPrint()}")
+                    break
+
+                for key, prefix, (name, val) in zip(keys, prefixes, varBinds):
+                    if isinstance(val, (NoSuchObject, NoSuchInstance, EndOfMibView)):
+                        continue
+                    oid = tuple(name.getOid())
+                    # Columns that ran past their subtree are padded by pysnmp
+                    if oid[:len(prefix)] != prefix:
+                        continue
+                    index = '.'.join(str(part) for part in oid[len(prefix):])
+                    rows.setdefault(index, {})[key] = val
+
+        return rows
+
+    def close(self):
+        """Release the engine's transport sockets"""
+        dispatcher = getattr(self.engine, 'transportDispatcher', None)
+        if dispatcher is not None:
+            try:
+                dispatcher.closeDispatcher()
+            except Exception as e:
+                logging.debug(f"Error closing SNMP session for {self.ip}: {e}")
+
+
+class SnmpSessionPool:
+    """Thread-safe pool of SnmpSession objects with idle eviction"""
+
+    def __init__(self, idle_timeout: float = 300, sweep_interval: float = 60):
+        self.idle_timeout = idle_timeout
+        self.sweep_interval = sweep_interval
+        self.sessions: Dict[Tuple, SnmpSession] = {}
+        self.lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def get_session(self, ip: str, community: str = 'public', version: str = '2c',
+                    timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES) -> SnmpSession:
+        """Return the cached session for an agent, creating it if needed"""
+        key = (ip, community, version, float(timeout), int(retries))
+
+        with self.lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = SnmpSession(ip, community, version, timeout=timeout, retries=retries)
+                self.sessions[key] = session
+            session.last_used = time.time()
+
+            expired = self._collect_idle()
+
+        for idle in expired:
+            idle.close()
+
+        return session
+
+    def _collect_idle(self):
+        """Remove idle sessions from the pool (caller holds self.lock)"""
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval:
+            return []
+        self._last_sweep = now
+
+        expired = []
+        for key, session in list(self.sessions.items()):
+            if now - session.last_used < self.idle_timeout:
+                continue
+            # Skip sessions with a request in flight
+            if not session.lock.acquire(blocking=False):
+                continue
+            try:
+                del self.sessions[key]
+                expired.append(session)
+            finally:
+                session.lock.release()
+
+        if expired:
+            logging.debug(f"Evicted {len(expired)} idle SNMP sessions")
+        return expired
+
+
+# Shared by every device manager in the process
+snmp_sessions = SnmpSessionPool()
+
+
+def get_session(ip: str, community: str = 'public', version: str = '2c',
+                timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES) -> SnmpSession:
+    """Return the process-wide cached SNMP session for an agent"""
+    return snmp_sessions.get_session(ip, community, version, timeout, retries)
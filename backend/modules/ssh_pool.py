@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+SSH Pool Module
+
+Bounded pool of netmiko SSH sessions per device:
+- Sessions are kept alive and reused instead of logging in per operation
+- Idle sessions are health-checked before reuse
+- Concurrent sessions per device are capped
+- Sessions idle for too long are closed by a shared reaper thread
+"""
+
+import time
+import logging
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+try:
+    from netmiko import ConnectHandler
+except ImportError as e:
+    logging.error(f"Required libraries not installed: {e}")
+    logging.info("Please run: pip install -r requirements.txt")
+
+
+class SshPoolTimeout(Exception):
+    """Raised when no SSH session becomes available in time"""
+    pass
+
+
+class SshSessionPool:
+    """Pool of reusable SSH sessions to a single device"""
+
+    def __init__(self, connection_params: Dict, max_sessions: int = 2,
+                 idle_timeout: float = 300, acquire_timeout: float = 30):
+        self.connection_params = connection_params
+        self.host = connection_params.get('host')
+        self.max_sessions = max(1, int(max_sessions))
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.slots = threading.BoundedSemaphore(self.max_sessions)
+        self.idle: List[Tuple[object, float]] = []
+        self.lock = threading.Lock()
+        self.closed = False
+        _register_pool(self)
+
+    @contextmanager
+    def session(self):
+        """Borrow a healthy SSH session, returning it to the pool afterwards"""
+        if not self.slots.acquire(timeout=self.acquire_timeout):
+            raise SshPoolTimeout(f"No SSH session to {self.host} available "
+                                 f"within {self.acquire_timeout}s")
+        try:
+            connection = self._checkout()
+            try:
+                yield connection
+            except Exception:
+                # The session may be mid-command or desynchronized
+                self._disconnect(connection)
+                raise
+            self._checkin(connection)
+        finally:
+            self.slots.release()
+
+    def close_idle(self) -> int:
+        """Close sessions idle for longer than idle_timeout"""
+        now = time.time()
+        with self.lock:
+            expired = [conn for conn, since in self.idle if now - since >= self.idle_timeout]
+            self.idle = [(conn, since) for conn, since in self.idle if now - since < self.idle_timeout]
+
+        for connection in expired:
+            self._disconnect(connection)
+
+        if expired:
+            logging.debug(f"Closed {len(expired)} idle SSH sessions to {self.host}")
+        return len(expired)
+
+    def close(self):
+        """Close all idle sessions and stop accepting returned ones"""
+        with self.lock:
+            self.closed = True
+            idle = [conn for conn, _ in self.idle]
+            self.idle = []
+
+        for connection in idle:
+            self._disconnect(connection)
+
+    def _checkout(self):
+        """Return a live idle session or open a new one"""
+        while True:
+            with self.lock:
+                if not self.idle:
+                    break
+                connection, _ = self.idle.pop()
+
+            if self._is_healthy(connection):
+                return connection
+            self._disconnect(connection)
+
+        logging.debug(f"Opening SSH session to {self.host}")
+        return ConnectHandler(**self.connection_params)
+
+    def _checkin(self, connection):
+        """Return a session to the idle list"""
+        with self.lock:
+            if not self.closed:
+                self.idle.append((connection, time.time()))
+                return
+        self._disconnect(connection)
+
+    def _is_healthy(self, connection) -> bool:
+        """Check that a pooled session is still usable"""
+        try:
+            return connection.is_alive()
+        except Exception:
+            return False
+
+    def _disconnect(self, connection):
+        """Close a session, ignoring errors from dead transports"""
+        try:
+            connection.disconnect()
+        except Exception as e:
+            logging.debug(f"Error closing SSH session to {self.host}: {e}")
+
+
+# Pools are tracked weakly so retired device managers are not kept alive
+_pools = weakref.WeakSet()
+_reaper = None
+_reaper_lock = threading.Lock()
+
+
+def _register_pool(pool: SshSessionPool):
+    """Track a pool and start the shared idle reaper on first use"""
+    global _reaper
+    with _reaper_lock:
+        _pools.add(pool)
+        if _reaper is None:
+            _reaper = threading.Thread(target=_reap_idle_sessions, name='ssh-reaper')
+            _reaper.daemon = True
+            _reaper.start()
+
+
+def _reap_idle_sessions(interval: float = 30):
+    """Periodically close idle sessions in every pool"""
+    while True:
+        time.sleep(interval)
+        with _reaper_lock:
+            pools = list(_pools)
+        for pool in pools:
+            try:
+                pool.close_idle()
+            except Exception as e:
+                logging.error(f"Error closing idle SSH sessions: {e}")
@@ -9,6 +9,8 @@ class NetworkDeviceManager {
     constructor() {
         this.apiBase = window.location.origin + '/api';
         this.refreshInterval = null;
+        this.eventSource = null;
+        this.reloadingDevices = false;
         this.currentTab = 'devices';
         this.devices = [];
         this.alerts = [];
@@ -20,7 +22,7 @@ class NetworkDeviceManager {
     init() {
         this.setupEventListeners();
         this.initializeTabs();
-        this.startAutoRefresh();
+        this.startLiveUpdates();
         this.loadInitialData();
         
         console.log('Network Device Manager initialized');
@@ -36,7 +38,7 @@ class NetworkDeviceManager {
         
         // Refresh button
         document.getElementById('refreshBtn').addEventListener('click', () => {
-            this.refreshData();
+            this.refreshData(true);
         });
         
         // Discovery button
@@ -127,6 +129,33 @@ class NetworkDeviceManager {
         }
     }
     
+    startLiveUpdates() {
+        if (!window.EventSource) {
+            this.startAutoRefresh();
+            return;
+        }
+        
+        // The server pushes a delta after each monitoring update
+        let connected = false;
+        this.eventSource = new EventSource(`${this.apiBase}/events`);
+        
+        this.eventSource.addEventListener('hello', () => {
+            // After a reconnect, reload whatever changed while disconnected
+            if (connected) {
+                this.loadInitialData();
+            }
+            connected = true;
+        });
+        
+        this.eventSource.addEventListener('update', (event) => {
+            this.applyUpdate(JSON.parse(event.data));
+        });
+        
+        this.eventSource.addEventListener('resync', () => {
+            this.loadInitialData();
+        });
+    }
+    
     startAutoRefresh() {
         // Refresh data every 30 seconds
         this.refreshInterval = setInterval(() => {
@@ -134,12 +163,77 @@ class NetworkDeviceManager {
         }, 30000);
     }
     
-    async loadInitialData() {
+    applyUpdate(delta) {
+        // Devices no longer monitored
+        const removed = new Set(delta.removed_devices || []);
+        if (removed.size) {
+            this.devices = this.devices.filter(d => !removed.has(d.id));
+        }
+        
+        // Changed device statuses; a device we have not seen yet (e.g. newly
+        // enabled) needs its full record, so reload the device list
+        let unknownDevice = false;
+        Object.entries(delta.devices || {}).forEach(([deviceId, status]) => {
+            const device = this.devices.find(d => d.id === deviceId);
+            if (!device) {
+                unknownDevice = true;
+                return;
+            }
+            const metrics = status.metrics || {};
+            device.status = status.status;
+            device.last_seen = status.last_seen;
+            ['cpu_usage', 'memory_usage', 'temperature'].forEach(metric => {
+                if (metric in metrics) {
+                    device[metric] = metrics[metric];
+                }
+            });
+            if ('client_count' in metrics) {
+                device.clients_connected = metrics.client_count;
+            }
+        });
+        
+        // New alerts go on top, updated ones are replaced in place
+        (delta.alerts || []).forEach(alert => {
+            const index = this.alerts.findIndex(a => a.id === alert.id);
+            if (index >= 0) {
+                this.alerts[index] = alert;
+            } else {
+                this.alerts.unshift(alert);
+            }
+        });
+        this.alerts = this.alerts.slice(0, 100);
+        
+        this.dashboardData = {
+            ...this.dashboardData,
+            summary: delta.summary,
+            metrics: delta.metrics,
+            device_types: delta.device_types,
+            last_updated: delta.last_updated
+        };
+        
+        this.renderDevices();
+        this.updateOverviewCards();
+        if (this.currentTab === 'alerts') {
+            this.renderAlerts();
+        } else if (this.currentTab === 'monitoring') {
+            this.updateMetricsTable();
+        }
+        this.updateLastUpdated();
+        
+        if (unknownDevice && !this.reloadingDevices) {
+            this.reloadingDevices = true;
+            this.loadDevices().finally(() => {
+                this.reloadingDevices = false;
+            });
+        }
+    }
+    
+    async loadInitialData(fresh = false) {
         this.showLoading(true);
         
         try {
             await Promise.all([
-                this.loadDevices(),
+                this.loadDevices(fresh),
                 this.loadDashboardData(),
                 this.loadAlerts()
             ]);
@@ -152,12 +246,13 @@ class NetworkDeviceManager {
         this.updateLastUpdated();
     }
     
-    async refreshData() {
+    async refreshData(fresh = false) {
         try {
             const refreshBtn = document.getElementById('refreshBtn');
             refreshBtn.querySelector('i').classList.add('fa-spin');
             
-            await this.loadInitialData();
+            // A manual refresh re-polls devices instead of reading the cache
+            await this.loadInitialData(fresh);
             
             refreshBtn.querySelector('i').classList.remove('fa-spin');
             this.showNotification('Data refreshed successfully', 'success');
@@ -167,9 +262,9 @@ class NetworkDeviceManager {
         }
     }
     
-    async loadDevices() {
+    async loadDevices(fresh = false) {
         try {
-            const response = await fetch(`${this.apiBase}/devices`);
+            const response = await fetch(`${this.apiBase}/devices${fresh ? '?fresh=1' : ''}`);
             const data = await response.json();
             
             if (data.success) {
@@ -380,7 +475,7 @@ class NetworkDeviceManager {
     
     updateOverviewCards() {
         const onlineDevices = this.devices.filter(d => d.status === 'online').length;
-        const offlineDevices = this.devices.filter(d => d.status === 'offline' || d.status === 'error').length;
+        const offlineDevices = this.devices.filter(d => ['offline', 'error', 'timeout'].includes(d.status)).length;
         const totalClients = this.devices
             .filter(d => d.type === 'aruba_ap500')
             .reduce((sum, d) => sum + (d.clients_connected || 0), 0);
@@ -731,16 +826,34 @@ class NetworkDeviceManager {
                 headers: {
                     'Content-Type': 'application/json'
                 },
-                body: JSON.stringify({ network_range: networkRange })
+                body: JSON.stringify({ network_range: networkRange, stream: true })
             });
             
-            const data = await response.json();
-            
-            if (data.success) {
-                this.showDiscoveryResults(data.discovered);
-            } else {
+            if (!response.ok || !response.body) {
+                const data = await response.json();
                 throw new Error(data.error || 'Discovery failed');
             }
+            
+            // Results arrive as NDJSON: one record per host, then a summary
+            const discovered = [];
+            this.showDiscoveryResults(discovered, false);
+            
+            const summary = await this.readNdjsonStream(response, record => {
+                if (record.type === 'device') {
+                    discovered.push(record.device);
+                    this.appendDiscoveryResult(record.device);
+                }
+            });
+            
+            if (summary && summary.success === false) {
+                throw new Error(summary.error || 'Discovery failed');
+            }
+            
+            this.showDiscoveryResults(discovered);
+            if (summary) {
+                this.showNotification(
+                    `Discovered ${summary.count} devices in ${summary.elapsed_seconds}s`, 'success');
+            }
         } catch (error) {
             console.error('Error during discovery:', error);
             this.showNotification('Error during device discovery', 'error');
@@ -750,26 +863,67 @@ class NetworkDeviceManager {
         }
     }
     
-    showDiscoveryResults(discovered) {
+    async readNdjsonStream(response, onRecord) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let summary = null;
+        
+        const handleLine = line => {
+            if (!line.trim()) return;
+            const record = JSON.parse(line);
+            if (record.type === 'summary') {
+                summary = record;
+            } else {
+                onRecord(record);
+            }
+        };
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.forEach(handleLine);
+        }
+        handleLine(buffer);
+        
+        return summary;
+    }
+    
+    createDiscoveryItem(device) {
+        return `
+            <div class="discovery-item">
+                <div>
+                    <strong>${device.ip}</strong>
+                    ${device.name ? ` - ${device.name}` : ''}
+                    ${device.type ? `<span class="device-type">${this.formatDeviceType(device.type)}</span>` : ''}
+                </div>
+                <div>${device.status || 'Unknown'}</div>
+            </div>
+        `;
+    }
+    
+    appendDiscoveryResult(device) {
+        const container = document.getElementById('discoveryResults');
+        container.insertAdjacentHTML('beforeend', this.createDiscoveryItem(device));
+    }
+    
+    showDiscoveryResults(discovered, complete = true) {
         const container = document.getElementById('discoveryResults');
         
         if (discovered.length === 0) {
-            container.innerHTML = '<p>No devices discovered in the specified range.</p>';
+            container.innerHTML = complete ? '<p>No devices discovered in the specified range.</p>' : '';
         } else {
-            container.innerHTML = discovered.map(device => `
-                <div class="discovery-item">
-                    <div>
-                        <strong>${device.ip}</strong>
-                        ${device.name ? ` - ${device.name}` : ''}
-                        ${device.type ? `<span class="device-type">${this.formatDeviceType(device.type)}</span>` : ''}
-                    </div>
-                    <div>${device.status || 'Unknown'}</div>
-                </div>
-            `).join('');
+            container.innerHTML = discovered.map(device => this.createDiscoveryItem(device)).join('');
         }
         
         container.style.display = 'block';
         
+        if (!complete) return;
+        
         // Refresh devices list
         setTimeout(() => {
             this.loadDevices();
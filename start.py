@@ -34,7 +34,8 @@ def check_dependencies():
         'schedule',
         'psutil',
         'jsonschema',
-        'pyyaml'
+        'pyyaml',
+        'numpy'
     ]
     
     missing_packages = []
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for the config diff module: parsing of Comware and ArubaOS configs
+and the CLI commands generated from a diff
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend', 'modules'))
+
+from config_diff import ARUBAOS, COMWARE, config_hash, diff_configs, parse_config
+
+COMWARE_RUNNING = """#
+ version 5.20, Release 2202P19
+#
+ sysname A
+ ftp server enable
+#
+ radius scheme system
+  primary authentication 127.0.0.1 1645
+#
+local-user admin
+ password simple secret
+ service-type telnet
+#
+ospf 1
+ area 0.0.0.0
+  network 10.0.0.0 0.0.0.255
+#
+interface Vlan-interface2
+ ip address 10.0.0.1 255.255.255.0
+#
+return
+"""
+
+
+class ParseConfigTest(unittest.TestCase):
+
+    def test_comware_globals_are_sibling_stanzas(self):
+        stanzas = parse_config(COMWARE_RUNNING, COMWARE)
+        self.assertEqual(stanzas['sysname A'], [])
+        self.assertEqual(stanzas['ftp server enable'], [])
+
+    def test_comware_deeper_lines_are_children(self):
+        stanzas = parse_config(COMWARE_RUNNING, COMWARE)
+        self.assertEqual(stanzas['radius scheme system'], ['primary authentication 127.0.0.1 1645'])
+        self.assertEqual(stanzas['local-user admin'], ['password simple secret', 'service-type telnet'])
+
+    def test_nested_views_keep_relative_depth(self):
+        stanzas = parse_config(COMWARE_RUNNING, COMWARE)
+        self.assertEqual(stanzas['ospf 1'], ['area 0.0.0.0', ' network 10.0.0.0 0.0.0.255'])
+
+    def test_ignored_lines_are_dropped(self):
+        stanzas = parse_config(COMWARE_RUNNING, COMWARE)
+        self.assertFalse(any(header.startswith(('version', 'return')) for header in stanzas))
+
+    def test_arubaos_stanzas(self):
+        stanzas = parse_config("hostname ap1\n!\nwlan ssid-profile corp\n essid corp\n!\nend\n", ARUBAOS)
+        self.assertEqual(list(stanzas.items()), [
+            ('hostname ap1', []),
+            ('wlan ssid-profile corp', ['essid corp'])
+        ])
+
+    def test_hash_ignores_comments_and_blank_lines(self):
+        reformatted = COMWARE_RUNNING.replace('#\n', '#\n\n')
+        self.assertEqual(config_hash(COMWARE_RUNNING, COMWARE), config_hash(reformatted, COMWARE))
+
+
+class ToCommandsTest(unittest.TestCase):
+
+    def test_identical_configs(self):
+        diff = diff_configs(COMWARE_RUNNING, COMWARE_RUNNING, COMWARE)
+        self.assertTrue(diff.is_empty())
+        self.assertEqual(diff.to_commands(), [])
+
+    def test_rename_in_global_block(self):
+        diff = diff_configs("#\n sysname A\n ftp server enable\n#\n",
+                            "#\n sysname B\n ftp server enable\n#\n", COMWARE)
+        self.assertEqual(diff.to_commands(), ['undo sysname A', 'sysname B'])
+        self.assertEqual(diff.summary()['added'], ['sysname B'])
+        self.assertEqual(diff.summary()['removed'], ['sysname A'])
+
+    def test_changed_view(self):
+        target = COMWARE_RUNNING.replace('password simple secret', 'password simple other')
+        diff = diff_configs(COMWARE_RUNNING, target, COMWARE)
+        self.assertEqual(diff.to_commands(), [
+            'local-user admin', 'undo password simple secret', 'password simple other', 'quit'
+        ])
+        self.assertEqual(diff.summary()['changed'], ['local-user admin'])
+
+    def test_nested_view_changes_leave_every_view(self):
+        target = COMWARE_RUNNING.replace(
+            '  network 10.0.0.0 0.0.0.255\n',
+            '  network 10.0.0.0 0.0.0.255\n  network 10.1.0.0 0.0.0.255\n'
+            ' area 0.0.0.1\n  network 10.2.0.0 0.0.0.255\n')
+        diff = diff_configs(COMWARE_RUNNING, target, COMWARE)
+        self.assertEqual(diff.to_commands(), [
+            'ospf 1',
+            'area 0.0.0.0', 'network 10.1.0.0 0.0.0.255', 'quit',
+            'area 0.0.0.1', 'network 10.2.0.0 0.0.0.255', 'quit',
+            'quit'
+        ])
+
+    def test_added_view(self):
+        target = COMWARE_RUNNING.replace('return', 'vlan 10\n name users\n#\nreturn')
+        diff = diff_configs(COMWARE_RUNNING, target, COMWARE)
+        self.assertEqual(diff.to_commands(), ['vlan 10', 'name users', 'quit'])
+
+    def test_removed_view_undoes_children_then_header(self):
+        target = COMWARE_RUNNING.replace('interface Vlan-interface2\n ip address 10.0.0.1 255.255.255.0\n#\n', '')
+        diff = diff_configs(COMWARE_RUNNING, target, COMWARE)
+        self.assertEqual(diff.to_commands(), [
+            'interface Vlan-interface2', 'undo ip address 10.0.0.1 255.255.255.0', 'quit',
+            'undo interface Vlan-interface2'
+        ])
+
+    def test_partial_target_removes_nothing(self):
+        diff = diff_configs(COMWARE_RUNNING, "#\n sysname B\n#\nlocal-user admin\n service-type ssh\n#\n",
+                            COMWARE, replace=False)
+        self.assertEqual(diff.to_commands(), ['sysname B', 'local-user admin', 'service-type ssh', 'quit'])
+        self.assertEqual(diff.summary()['removed'], [])
+
+    def test_partial_target_subset_is_empty(self):
+        diff = diff_configs(COMWARE_RUNNING, "local-user admin\n service-type telnet\n", COMWARE, replace=False)
+        self.assertTrue(diff.is_empty())
+
+    def test_arubaos_negation(self):
+        diff = diff_configs("hostname ap1\n!\nwlan ssid-profile corp\n essid corp\n!\n",
+                            "hostname ap2\n!\n", ARUBAOS)
+        self.assertEqual(diff.to_commands(), [
+            'no hostname ap1', 'hostname ap2',
+            'wlan ssid-profile corp', 'no essid corp', 'exit', 'no wlan ssid-profile corp'
+        ])
+
+
+class CommandErrorsTest(unittest.TestCase):
+
+    def test_rejected_commands_are_reported_with_their_error(self):
+        output = ("[A]undo sysname A\n"
+                  "             ^\n"
+                  " % Too many parameters found at '^' position.\n"
+                  "[A]sysname B\n"
+                  "[B]")
+        self.assertEqual(COMWARE.command_errors(output), [
+            "[A]undo sysname A: % Too many parameters found at '^' position."
+        ])
+
+    def test_clean_output_has_no_errors(self):
+        self.assertEqual(ARUBAOS.command_errors("ap(config)# hostname ap2\nap2(config)# exit"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()